@@ -0,0 +1,431 @@
+"""
+Benchmark headless dei percorsi critici dell'overlay (piattaforma Qt offscreen).
+
+Il backend è sostituito da un client finto con risposte precalcolate, quindi si
+misura solo il lavoro lato client: decodifica e diff nel worker, applicazione
+sul thread UI, inserimento righe.
+
+    python bench_overlay.py
+    python bench_overlay.py --save-baseline bench_baseline.json
+    python bench_overlay.py --baseline bench_baseline.json   # exit 1 se c'è una regressione
+
+Ogni benchmark gira in un processo a sé (il picco di memoria è il suo) e ogni
+esecuzione usa una cartella dati nuova (stato dei match e storico prezzi non si accumulano).
+
+Per misure end-to-end con la rete si può usare local_backend.py.
+"""
+import argparse
+import atexit
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ["WMSNIPER_MATCH_STREAM"] = "0"
+
+from PyQt5.QtCore import QEvent, QEventLoop
+from PyQt5.QtWidgets import QApplication
+
+import ov
+
+MATCH_SIZES = (10, 100, 1000, 10000)
+REMOVE_SIZES = (1000, 10000)
+CHURN = 0.1               # quota di match sostituiti a ogni poll
+DEFAULT_TOLERANCE = 0.25  # +25% rispetto alla baseline = regressione
+MIN_REGRESSION_MS = 5     # sotto questa differenza assoluta è rumore (passaggi worker -> UI, GC)
+
+
+def peak_rss_mb():
+    """Picco di memoria residente del processo (quindi del benchmark che ci gira), in MB (None se non disponibile)"""
+    try:
+        import resource
+    except ImportError:
+        return _peak_rss_windows()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux in KB, macOS in byte
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _peak_rss_windows():
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize / (1024 * 1024)
+    except Exception:
+        return None
+
+
+# --- backend finto ---
+
+class FakeResponse:
+    def __init__(self, status_code=200, payload=None, headers=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+        self.text = ""
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"Status {self.status_code}")
+
+
+class FakeClient:
+    """Stessa interfaccia di BackendClient; le risposte sono in code per path"""
+
+    def __init__(self):
+        self.queues = {}
+
+    def push(self, path, payload):
+        self.queues.setdefault(path, []).append(payload)
+
+    def get(self, path, params=None, **kwargs):
+        queue = self.queues.get(path)
+        if not queue:
+            return FakeResponse(404)
+        return FakeResponse(200, queue.pop(0))
+
+    def post(self, path, **kwargs):
+        return FakeResponse(200, {})
+
+    def set_user_id(self, user_id):
+        pass
+
+    def close(self):
+        pass
+
+
+def synthetic_offer(rng, item, n):
+    return {'item': item, 'seller': f"Tenno{n}", 'price': rng.randint(1, 500),
+            'display_name': item.replace("_", " ").title()}
+
+
+def match_payloads(rng, count, cycles, items=40):
+    """Primo poll completo, poi delta con CHURN dei match sostituiti a ogni poll"""
+    names = [f"item_{i}" for i in range(items)]
+    serial = 0
+    current = []
+    for _ in range(count):
+        serial += 1
+        current.append(synthetic_offer(rng, rng.choice(names), serial))
+    payloads = [{'cursor': "0", 'matches': list(current)}]
+    for cycle in range(cycles):
+        n = max(1, int(count * CHURN))
+        rng.shuffle(current)
+        removed, current = current[:n], current[n:]
+        added = []
+        for _ in range(n):
+            serial += 1
+            added.append(synthetic_offer(rng, rng.choice(names), serial))
+        current.extend(added)
+        payloads.append({'cursor': str(cycle + 1), 'added': added, 'removed': removed})
+    return payloads
+
+
+# --- utilità ---
+
+def wait_until(app, done, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while not done():
+        if time.perf_counter() > deadline:
+            raise RuntimeError("benchmark timed out")
+        app.processEvents(QEventLoop.AllEvents, 5)
+
+
+def fresh_data_dir():
+    """Cartella dati vuota per questa esecuzione, e stato condiviso di ov ripartito da zero"""
+    root = os.environ.get("WMSNIPER_DATA_DIR")
+    if not root:
+        # eseguito fuori da run_all: cartella temporanea rimossa all'uscita
+        root = os.environ["WMSNIPER_DATA_DIR"] = tempfile.mkdtemp(prefix="wmsniper-bench-")
+        atexit.register(shutil.rmtree, root, True)
+    ov.DATA_DIR = tempfile.mkdtemp(prefix="run-", dir=root)
+    ov._price_histories.clear()
+    ov._catalog = None
+
+
+def new_overlay(client):
+    fresh_data_dir()
+    ov._client = client
+    overlay = ov.Overlay("bench")
+    overlay.scheduler.stop()
+    # la MatchSync dell'overlay usa già il client finto e registra lo storico prezzi come in produzione
+    overlay.show()
+    return overlay
+
+
+def dispose(app, widget):
+    if hasattr(widget, 'executor'):
+        widget.executor.shutdown()
+    widget.hide()
+    widget.deleteLater()
+    # fuori dall'event loop deleteLater non basta: i widget contati dopo sarebbero ancora vivi
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+    app.processEvents()
+
+
+def ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+# --- benchmark ---
+
+def bench_matches(app, count, cycles):
+    """check_notifications: poll completo iniziale e poi poll con churn, fino alle righe inserite"""
+    client = FakeClient()
+    for payload in match_payloads(random.Random(count), count, cycles):
+        client.push("/matches", payload)
+    overlay = new_overlay(client)
+    key = ('GET', '/matches')
+
+    def _poll():
+        start = time.perf_counter()
+        overlay.check_notifications()
+        wait_until(app, lambda: not overlay.executor.is_pending(key) and not overlay.pending_rows)
+        return time.perf_counter() - start
+
+    first = _poll()
+    times = [_poll() for _ in range(cycles)]
+    result = {
+        'first_ms': ms(first),
+        'cycle_ms': ms(statistics.median(times)),
+        'total_ms': ms(first + sum(times)),
+        'rows': overlay.offer_model.rowCount(),
+        'widgets': len(app.allWidgets()),
+    }
+    dispose(app, overlay)
+    return result
+
+
+def bench_manual_refresh(app, pins=6, offers=200, cycles=30):
+    """Refresh di più item seguiti nel tab Warframe Market, con churn delle offerte"""
+    client = FakeClient()
+    rng = random.Random(7)
+    overlay = new_overlay(client)
+    tab = overlay.ensure_manual_tab()
+    books = {}
+    for p in range(pins):
+        item = f"item_{p}"
+        books[item] = [synthetic_offer(rng, item, n) for n in range(offers)]
+        client.push("/manual_offers", list(books[item]))
+        tab.search_offers(item, "All")
+    overlay.scheduler.stop()
+    wait_until(app, lambda: not overlay.executor._inflight)
+
+    times = []
+    serial = offers
+    for _ in range(cycles):
+        for item, book in books.items():
+            n = max(1, int(len(book) * CHURN))
+            rng.shuffle(book)
+            del book[:n]
+            for _ in range(n):
+                serial += 1
+                book.append(synthetic_offer(rng, item, serial))
+            client.push("/manual_offers", list(book))
+        start = time.perf_counter()
+        for item in books:
+            tab.refresh_offers(ov.to_item_url(item))
+        wait_until(app, lambda: not overlay.executor._inflight)
+        times.append(time.perf_counter() - start)
+    result = {
+        'cycle_ms': ms(statistics.median(times)),
+        'total_ms': ms(sum(times)),
+        'rows': sum(g.offer_model.rowCount() for g in tab.groups.values()),
+        'widgets': len(app.allWidgets()),
+    }
+    dispose(app, overlay)
+    return result
+
+
+def bench_autocomplete(app, updates=2000):
+    """update_autocomplete_list con liste che cambiano a ogni tasto"""
+    fresh_data_dir()
+    ov._client = FakeClient()
+    executor = ov.RequestExecutor()
+    dialog = ov.SearchDialog(executor)
+    dialog.show()
+    lists = [[{'display_name': f"{prefix} Prime Part {i}", 'item_url': f"{prefix}_{i}"} for i in range(size)]
+             for prefix, size in (("Ash", 10), ("Saryn", 10), ("Volt", 3), ("Nova", 7))]
+    times = []
+    for n in range(updates):
+        start = time.perf_counter()
+        dialog.update_autocomplete_list(lists[n % len(lists)])
+        times.append(time.perf_counter() - start)
+    app.processEvents()
+    result = {
+        'update_ms': ms(statistics.median(times)),
+        'total_ms': ms(sum(times)),
+        'rows': dialog.autocomplete_list.count(),
+        'widgets': len(app.allWidgets()),
+    }
+    executor.shutdown()
+    dispose(app, dialog)
+    return result
+
+
+def bench_remove_item(app, count, others=1000):
+    """remove_item_widgets su un item con molte righe, in mezzo ad altre"""
+    client = FakeClient()
+    rng = random.Random(count)
+    offers = [synthetic_offer(rng, "big_item", n) for n in range(count)]
+    offers += [synthetic_offer(rng, f"item_{n % 40}", count + n) for n in range(others)]
+    rng.shuffle(offers)
+    client.push("/matches", {'cursor': "0", 'matches': offers})
+    overlay = new_overlay(client)
+    overlay.check_notifications()
+    wait_until(app, lambda: not overlay.executor._inflight and not overlay.pending_rows)
+    rows_before = overlay.offer_model.rowCount()
+    start = time.perf_counter()
+    overlay.remove_item_widgets("big_item")
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    result = {
+        'remove_ms': ms(elapsed),
+        'rows_before': rows_before,
+        'rows': overlay.offer_model.rowCount(),
+        'widgets': len(app.allWidgets()),
+    }
+    dispose(app, overlay)
+    return result
+
+
+def benchmarks(app, quick=False):
+    cycles = 5 if quick else 20
+    benchmarks = []
+    for count in MATCH_SIZES:
+        if quick and count > 1000:
+            continue
+        benchmarks.append((f"matches_{count}", lambda c=count: bench_matches(app, c, cycles)))
+    benchmarks.append(("manual_refresh", lambda: bench_manual_refresh(app, cycles=10 if quick else 30)))
+    benchmarks.append(("autocomplete", lambda: bench_autocomplete(app, 500 if quick else 2000)))
+    for count in REMOVE_SIZES:
+        if quick and count > 1000:
+            continue
+        benchmarks.append((f"remove_item_{count}", lambda c=count: bench_remove_item(app, c)))
+    return benchmarks
+
+
+def run_one(app, name, quick=False, repeat=3):
+    """Esegue un solo benchmark in questo processo"""
+    func = dict(benchmarks(app, quick))[name]
+    # il primo giro scalda cache e import; dei successivi si tiene il tempo migliore,
+    # il meno disturbato da scheduler e GC
+    if not quick:
+        func()
+    runs = [func() for _ in range(max(1, repeat))]
+    result = {k: (min(r[k] for r in runs) if k.endswith("_ms") else v) for k, v in runs[-1].items()}
+    result['peak_rss_mb'] = round(peak_rss_mb() or 0, 1)
+    return result
+
+
+def run_all(quick=False, repeat=3):
+    """Ogni benchmark in un sottoprocesso, con la sua cartella dati temporanea"""
+    results = {}
+    for name, _ in benchmarks(None, quick):
+        root = tempfile.mkdtemp(prefix="wmsniper-bench-")
+        try:
+            out = os.path.join(root, "result.json")
+            cmd = [sys.executable, os.path.abspath(__file__), "--run", name, "--result", out,
+                   "--repeat", str(repeat)] + (["--quick"] if quick else [])
+            proc = subprocess.run(cmd, env={**os.environ, "WMSNIPER_DATA_DIR": root},
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            if proc.returncode != 0 or not os.path.exists(out):
+                raise RuntimeError(f"benchmark {name} failed:\n{proc.stderr}")
+            with open(out, "r", encoding="utf-8") as f:
+                result = json.load(f)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        results[name] = result
+        print(f"{name:<18} " + "  ".join(f"{k}={v}" for k, v in result.items()), flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Restituisce l'elenco delle regressioni rispetto alla baseline"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, value in result.items():
+            old = base.get(metric)
+            if not isinstance(old, (int, float)) or not old:
+                continue
+            if metric.endswith("_ms"):
+                if value > old * (1 + tolerance) and value - old > MIN_REGRESSION_MS:
+                    regressions.append(f"{name}.{metric}: {old} -> {value} ms (+{(value / old - 1) * 100:.0f}%)")
+            elif metric == "peak_rss_mb":
+                if value > old * (1 + tolerance):
+                    regressions.append(f"{name}.{metric}: {old} -> {value} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the WM Sniper overlay")
+    parser.add_argument("--baseline", help="compare with this baseline JSON and exit 1 on regressions")
+    parser.add_argument("--save-baseline", help="write the results to this baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before a regression is reported (0.25 = 25%%)")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, no warm-up run")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the best time is kept")
+    parser.add_argument("--json", help="also write the results to this file")
+    # uso interno: un solo benchmark, risultato in un file (così stdout resta libero per i print di ov)
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run:
+        app = QApplication.instance() or QApplication(sys.argv)
+        result = run_one(app, args.run, quick=args.quick, repeat=args.repeat)
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return 0
+
+    results = run_all(quick=args.quick, repeat=args.repeat)
+    report = {'python': sys.version.split()[0], 'platform': sys.platform, 'quick': args.quick,
+              'results': results}
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=1)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored.get('quick', False) != args.quick:
+            print("Warning: the baseline was recorded with a different --quick setting")
+        baseline = stored.get('results', {})
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print("No regressions against", args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
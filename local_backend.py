@@ -0,0 +1,468 @@
+"""
+Backend locale di riferimento per WM Sniper, con dati di mercato sintetici.
+
+Implementa lo stesso contratto HTTP usato da ov.py, così l'overlay può essere
+provato, caricato e misurato senza rete:
+
+    python local_backend.py --port 8080 --rate 20 --latency 50
+    WMSNIPER_BACKEND_URL=http://127.0.0.1:8080 python ov.py
+
+Endpoint: /matches (ETag, ?since=<cursor>, 410), /matches/stream (SSE),
+/start_watch, /stop_watch, /clear_matches, /start_watch_batch,
+/stop_watch_batch, /manual_offers, /autocomplete, /catalog.
+L'utente è identificato dall'header X-User-ID (o dal campo user_id).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+
+from flask import Flask, Response, jsonify, request
+
+# Nomi sintetici, nello stile di warframe.market
+FRAMES = ["Ash", "Atlas", "Banshee", "Chroma", "Ember", "Equinox", "Frost", "Gara", "Harrow",
+          "Hydroid", "Inaros", "Ivara", "Limbo", "Loki", "Mag", "Mesa", "Mirage", "Nekros",
+          "Nezha", "Nidus", "Nova", "Nyx", "Oberon", "Octavia", "Rhino", "Saryn", "Titania",
+          "Trinity", "Valkyr", "Vauban", "Volt", "Wukong", "Zephyr"]
+PARTS = ["Set", "Blueprint", "Chassis", "Neuroptics", "Systems"]
+WEAPONS = ["Akstiletto", "Boltor", "Braton", "Burston", "Fang", "Galatine", "Glaive", "Kronen",
+           "Lex", "Nikana", "Orthos", "Paris", "Rubico", "Soma", "Tigris", "Vectis", "Zakti"]
+WEAPON_PARTS = ["Set", "Barrel", "Receiver", "Stock", "Blade", "Handle", "Blueprint"]
+MODS = ["Continuity", "Flow", "Fury", "Point Blank", "Pressure Point", "Reach", "Shred",
+        "Streamline", "Target Cracker", "Bane of Grineer", "Chamber", "Cryo Rounds", "Heated Charge"]
+MOD_MAX_RANKS = (3, 5, 10)
+
+MATCH_LOG_MAX = 5000     # eventi per utente conservati per i delta; oltre -> 410
+STREAM_KEEPALIVE = 15    # secondi tra due commenti keep-alive sullo stream
+
+
+def to_item_url(display_name):
+    return display_name.replace(" ", "_").lower()
+
+
+def build_catalog(count, rng):
+    """Lista di item {display_name, item_url, max_rank, base_price}"""
+    names = [f"{f} Prime {p}" for f in FRAMES for p in PARTS]
+    names += [f"{w} Prime {p}" for w in WEAPONS for p in WEAPON_PARTS]
+    mods = [f"Primed {m}" for m in MODS] + MODS
+    rng.shuffle(names)
+    items = []
+    for name in mods + names:
+        if len(items) >= count:
+            break
+        is_mod = name in mods
+        items.append({
+            'display_name': name,
+            'item_url': to_item_url(name),
+            'max_rank': rng.choice(MOD_MAX_RANKS) if is_mod else None,
+            'base_price': rng.randint(5, 400),
+        })
+    return items
+
+
+class UserState:
+    """Watch e match di un utente, con il registro eventi per delta e stream"""
+
+    def __init__(self):
+        self.watches = {}     # item_url -> filtri di start_watch
+        self.matches = {}     # (item, seller, price) -> offerta
+        self.log = deque()    # (seq, 'added'|'removed', offerta)
+        self.seq = 0
+        self.epoch = random.randrange(1 << 30)  # cambia l'ETag a ogni riavvio
+
+    def record(self, kind, offer):
+        self.seq += 1
+        self.log.append((self.seq, kind, offer))
+        if len(self.log) > MATCH_LOG_MAX:
+            self.log.popleft()
+
+    @property
+    def etag(self):
+        return f'"{self.epoch}-{self.seq}"'
+
+    def oldest_cursor(self):
+        return self.log[0][0] - 1 if self.log else self.seq
+
+    def changes_since(self, since):
+        """
+        Differenze nette dopo since, per chiave: vale l'ultimo evento, e una chiave
+        aggiunta e poi rimossa nella finestra non compare affatto.
+        """
+        net = {}  # chiave -> (primo tipo, ultimo tipo, offerta)
+        for seq, kind, offer in self.log:
+            if seq <= since:
+                continue
+            key = (offer['item'], offer['seller'], offer['price'])
+            first = net[key][0] if key in net else kind
+            net[key] = (first, kind, offer)
+        added, removed = [], []
+        for first, last, offer in net.values():
+            if first == 'added' and last == 'removed':
+                continue  # non c'era a since e non c'è ora
+            (added if last == 'added' else removed).append(offer)
+        return added, removed
+
+
+class Market:
+    """Ordini di vendita sintetici che arrivano e spariscono nel tempo"""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.items = build_catalog(args.items, self.rng)
+        self.by_url = {it['item_url']: it for it in self.items}
+        self.sellers = [f"Tenno{i:04d}" for i in range(args.sellers)]
+        self.orders = {it['item_url']: {} for it in self.items}  # item_url -> key -> offerta
+        self.order_keys = []  # tutte le chiavi, per scegliere a caso cosa sparisce
+        self.users = {}
+        self.cond = threading.Condition()
+        self.catalog_version = f'"catalog-{args.seed}-{len(self.items)}"'
+        for it in self.items:
+            for _ in range(args.orders):
+                self._new_order(it)
+
+    # --- ordini ---
+
+    def _new_order(self, item):
+        rank = None
+        if item['max_rank'] is not None:
+            rank = item['max_rank'] if self.rng.random() < 0.4 else self.rng.randint(0, item['max_rank'])
+        price = max(1, int(item['base_price'] * self.rng.uniform(0.6, 1.6)))
+        seller = self.rng.choice(self.sellers)
+        key = (item['item_url'], seller, price)
+        book = self.orders[item['item_url']]
+        if key in book:
+            return None
+        status = self.rng.choices(("ingame", "online", "offline"), (5, 3, 2))[0]
+        offer = {'item': item['item_url'], 'seller': seller, 'price': price,
+                 'display_name': item['display_name'], 'rank': rank, 'status': status}
+        book[key] = offer
+        self.order_keys.append(key)
+        return offer
+
+    def _drop_order(self):
+        if not self.order_keys:
+            return None
+        i = self.rng.randrange(len(self.order_keys))
+        keys = self.order_keys
+        keys[i], keys[-1] = keys[-1], keys[i]
+        key = keys.pop()
+        return self.orders[key[0]].pop(key, None)
+
+    def tick(self, dt):
+        """Fa evolvere il mercato di dt secondi; da chiamare dal thread del mercato"""
+        args = self.args
+        adds = self._count(args.rate * dt)
+        drops = self._count(args.churn * dt)
+        with self.cond:
+            watched = sorted({u for user in self.users.values() for u in user.watches})
+            for _ in range(adds):
+                if watched and self.rng.random() < args.watched_bias:
+                    item = self.by_url.get(self.rng.choice(watched))
+                else:
+                    item = self.rng.choice(self.items)
+                if item is not None:
+                    offer = self._new_order(item)
+                    if offer is not None:
+                        self._notify_added(offer)
+            for _ in range(drops):
+                offer = self._drop_order()
+                if offer is not None:
+                    self._notify_removed(offer)
+            if adds or drops:
+                self.cond.notify_all()
+
+    def burst(self, count):
+        """Molti ordini insieme sugli item sorvegliati, per provare le raffiche di notifiche"""
+        with self.cond:
+            watched = sorted({u for user in self.users.values() for u in user.watches})
+            if not watched:
+                return
+            for _ in range(count):
+                offer = self._new_order(self.by_url[self.rng.choice(watched)])
+                if offer is not None:
+                    self._notify_added(offer)
+            self.cond.notify_all()
+
+    def _count(self, expected):
+        # parte intera più un ordine in più con probabilità pari alla parte decimale
+        n = int(expected)
+        return n + (1 if self.rng.random() < expected - n else 0)
+
+    # --- utenti e match ---
+
+    def user(self, user_id):
+        state = self.users.get(user_id)
+        if state is None:
+            state = self.users[user_id] = UserState()
+        return state
+
+    @staticmethod
+    def matches_watch(offer, watch, item):
+        if offer['price'] > watch['max_price']:
+            return False
+        if watch['rank_choice'] == "maxed" and item['max_rank'] is not None:
+            max_rank = watch['max_rank_override'] or item['max_rank']
+            return offer['rank'] == max_rank
+        return True
+
+    def _notify_added(self, offer):
+        item = self.by_url[offer['item']]
+        for state in self.users.values():
+            watch = state.watches.get(offer['item'])
+            if watch and self.matches_watch(offer, watch, item):
+                key = (offer['item'], offer['seller'], offer['price'])
+                if key not in state.matches:
+                    state.matches[key] = offer
+                    state.record('added', offer)
+
+    def _notify_removed(self, offer):
+        key = (offer['item'], offer['seller'], offer['price'])
+        for state in self.users.values():
+            if state.matches.pop(key, None) is not None:
+                state.record('removed', offer)
+
+    def start_watch(self, user_id, raw):
+        item_url = to_item_url(str(raw.get('item') or raw.get('item_url') or "").strip())
+        item = self.by_url.get(item_url)
+        if item is None:
+            return False, "Unknown item"
+        try:
+            max_price = int(float(raw.get('max_price') or 999999))
+            override = int(raw['max_rank_override']) if str(raw.get('max_rank_override') or "").strip() else None
+        except ValueError:
+            return False, "Invalid number"
+        watch = {'max_price': max_price,
+                 'rank_choice': str(raw.get('rank_choice') or "All").lower(),
+                 'max_rank_override': override}
+        with self.cond:
+            state = self.user(user_id)
+            state.watches[item_url] = watch
+            for offer in self.orders[item_url].values():
+                key = (item_url, offer['seller'], offer['price'])
+                if key not in state.matches and self.matches_watch(offer, watch, item):
+                    state.matches[key] = offer
+                    state.record('added', offer)
+            self.cond.notify_all()
+        return True, None
+
+    def stop_watch(self, user_id, item_url):
+        with self.cond:
+            return self.user(user_id).watches.pop(to_item_url(item_url), None) is not None
+
+    def clear_matches(self, user_id, item_url):
+        item_url = to_item_url(item_url)
+        with self.cond:
+            state = self.user(user_id)
+            for key in [k for k in state.matches if k[0] == item_url]:
+                state.record('removed', state.matches.pop(key))
+            self.cond.notify_all()
+
+    def manual_offers(self, item_url, rank, max_rank_override, statuses):
+        item = self.by_url.get(item_url)
+        if item is None:
+            return None
+        watch = {'max_price': float("inf"), 'rank_choice': rank, 'max_rank_override': max_rank_override}
+        with self.cond:
+            offers = [o for o in self.orders[item_url].values()
+                      if o['status'] in statuses and self.matches_watch(o, watch, item)]
+        offers.sort(key=lambda o: o['price'])
+        return offers
+
+
+def create_app(market, args):
+    app = Flask(__name__)
+
+    def user_id():
+        return request.headers.get('X-User-ID') or request.values.get('user_id') or request.remote_addr
+
+    @app.before_request
+    def _simulate_latency():
+        if request.path != "/matches/stream" and (args.latency or args.jitter):
+            time.sleep((args.latency + random.uniform(0, args.jitter)) / 1000)
+
+    @app.route("/matches")
+    def matches():
+        with market.cond:
+            state = market.user(user_id())
+            etag = state.etag
+            if request.headers.get('If-None-Match') == etag:
+                return Response(status=304, headers={'ETag': etag})
+            since = request.args.get('since')
+            if since is None:
+                body = {'cursor': str(state.seq), 'matches': list(state.matches.values())}
+            else:
+                try:
+                    since = int(since)
+                except ValueError:
+                    return Response("Invalid cursor", status=410)
+                if since < state.oldest_cursor() or since > state.seq:
+                    return Response("Cursor expired", status=410)
+                added, removed = state.changes_since(since)
+                body = {'cursor': str(state.seq), 'added': added, 'removed': removed}
+        resp = jsonify(body)
+        resp.headers['ETag'] = etag
+        return resp
+
+    @app.route("/matches/stream")
+    def matches_stream():
+        uid = user_id()
+        last_id = request.headers.get('Last-Event-ID')
+
+        def _events():
+            # mai yield con il lock preso: il generatore resta sospeso finché il client legge
+            reset = False
+            with market.cond:
+                state = market.user(uid)
+                cursor = state.seq
+                if last_id is not None:
+                    try:
+                        cursor = int(last_id)
+                    except ValueError:
+                        cursor = -1
+                    if cursor < state.oldest_cursor() or cursor > state.seq:
+                        cursor = state.seq
+                        reset = True
+            if reset:
+                yield "event: reset\ndata: {}\n\n"
+            yield ": connected\n\n"
+            while True:
+                with market.cond:
+                    state = market.user(uid)
+                    if state.seq <= cursor:
+                        market.cond.wait(STREAM_KEEPALIVE)
+                    pending = [e for e in state.log if e[0] > cursor]
+                if not pending:
+                    yield ": keep-alive\n\n"
+                    continue
+                for seq, kind, offer in pending:
+                    yield f"event: {kind}\nid: {seq}\ndata: {json.dumps(offer)}\n\n"
+                    cursor = seq
+
+        return Response(_events(), mimetype="text/event-stream",
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.route("/start_watch", methods=["POST"])
+    def start_watch():
+        ok, error = market.start_watch(user_id(), request.form)
+        return ("OK", 200) if ok else (error, 400)
+
+    @app.route("/stop_watch", methods=["POST"])
+    def stop_watch():
+        market.stop_watch(user_id(), request.form.get('item_url', ""))
+        return "OK"
+
+    @app.route("/clear_matches", methods=["POST"])
+    def clear_matches():
+        market.clear_matches(user_id(), request.form.get('item_url', ""))
+        return "OK"
+
+    @app.route("/start_watch_batch", methods=["POST"])
+    def start_watch_batch():
+        uid = user_id()
+        results = []
+        for raw in (request.get_json(silent=True) or {}).get('items', []):
+            ok, error = market.start_watch(uid, raw)
+            results.append({'item_url': to_item_url(str(raw.get('item') or "").strip()), 'ok': ok, 'error': error})
+        return jsonify(results=results)
+
+    @app.route("/stop_watch_batch", methods=["POST"])
+    def stop_watch_batch():
+        uid = user_id()
+        body = request.get_json(silent=True) or {}
+        results = []
+        for item_url in body.get('items', []):
+            market.stop_watch(uid, item_url)
+            if body.get('clear_matches'):
+                market.clear_matches(uid, item_url)
+            results.append({'item_url': to_item_url(item_url), 'ok': True, 'error': None})
+        return jsonify(results=results)
+
+    @app.route("/manual_offers")
+    def manual_offers():
+        statuses = {"ingame"} if request.args.get('seller_status') == "ingame" else {"ingame", "online"}
+        if request.args.get('online_only') == "false":
+            statuses.add("offline")
+        try:
+            override = int(request.args['max_rank_override']) if request.args.get('max_rank_override') else None
+        except ValueError:
+            override = None
+        offers = market.manual_offers(request.args.get('item_url', ""), request.args.get('rank', "all"),
+                                      override, statuses)
+        if offers is None:
+            return "Unknown item", 404
+        return jsonify(offers)
+
+    @app.route("/autocomplete")
+    def autocomplete():
+        q = request.args.get('q', "").strip().lower()
+        limit = request.args.get('limit', 10, type=int)
+        if not q:
+            return jsonify([])
+        starts = [it for it in market.items if it['display_name'].lower().startswith(q)]
+        contains = [it for it in market.items if q in it['display_name'].lower() and it not in starts]
+        return jsonify([{'display_name': it['display_name'], 'item_url': it['item_url']}
+                        for it in (starts + contains)[:limit]])
+
+    @app.route("/catalog")
+    def catalog():
+        version = market.catalog_version
+        if request.headers.get('If-None-Match') == version:
+            return Response(status=304, headers={'ETag': version})
+        resp = jsonify({'version': version,
+                        'items': [{'display_name': it['display_name'], 'item_url': it['item_url']}
+                                  for it in market.items]})
+        resp.headers['ETag'] = version
+        return resp
+
+    return app
+
+
+def run_market(market, args):
+    """Thread che fa evolvere il mercato e, se richiesto, genera raffiche periodiche"""
+    last = time.monotonic()
+    next_burst = last + args.burst_every if args.burst else None
+    while True:
+        time.sleep(args.tick)
+        now = time.monotonic()
+        market.tick(now - last)
+        last = now
+        if next_burst is not None and now >= next_burst:
+            market.burst(args.burst)
+            next_burst = now + args.burst_every
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in backend for WM Sniper with synthetic market data")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the synthetic market")
+    parser.add_argument("--items", type=int, default=300, help="number of catalog items")
+    parser.add_argument("--sellers", type=int, default=500, help="number of distinct sellers")
+    parser.add_argument("--orders", type=int, default=20, help="initial sell orders per item")
+    parser.add_argument("--rate", type=float, default=5, help="new sell orders per second")
+    parser.add_argument("--churn", type=float, default=5, help="sell orders removed per second")
+    parser.add_argument("--watched-bias", type=float, default=0.5,
+                        help="share of new orders placed on watched items")
+    parser.add_argument("--burst", type=int, default=0, help="orders added at once on watched items every --burst-every seconds")
+    parser.add_argument("--burst-every", type=float, default=30)
+    parser.add_argument("--latency", type=float, default=0, help="added latency per request, ms")
+    parser.add_argument("--jitter", type=float, default=0, help="random extra latency per request, ms")
+    parser.add_argument("--tick", type=float, default=0.2, help="market update period, seconds")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    market = Market(args)
+    threading.Thread(target=run_market, args=(market, args), name="market", daemon=True).start()
+    app = create_app(market, args)
+    print(f"Local backend on http://{args.host}:{args.port} "
+          f"({len(market.items)} items, {sum(map(len, market.orders.values()))} orders)")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import os
 import sys
 import requests
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, 
@@ -8,56 +9,74 @@ from PyQt5.QtGui import QKeySequence
 from PyQt5.QtCore import pyqtSignal
 import pyperclip
 
-BACKEND_URL = "http://127.0.0.1:8080"
+BACKEND_URL = os.environ.get("WMSNIPER_BACKEND_URL") or "http://127.0.0.1:8080"
 
 def to_item_url(display_name: str) -> str:
     return display_name.replace(" ", "_").lower()
 
+# Stile condiviso, applicato una volta sola al tab e non a ogni riga creata
+TAB_STYLESHEET = """
+    ManualOfferWidget { 
+        background-color: rgba(0,0,0,150); 
+        border-radius: 5px; 
+        margin: 2px;
+    }
+    ManualOfferWidget QLabel { 
+        color: white; 
+        font-size: 9pt;
+    }
+    ManualOfferWidget QPushButton { 
+        color: white; 
+        border: none; 
+        border-radius: 3px; 
+        padding: 2px 4px;
+        font-size: 9pt;
+    }
+    #copyButton {
+        background-color: #4CAF50; 
+        min-width: 50px;
+    }
+    #copyButton:hover {
+        background-color: #45a049; 
+    }
+    #removeButton {
+        background-color: #95a5a6;
+        min-width: 60px;
+    }
+    #removeButton:hover {
+        background-color: #7f8c8d;
+    }
+    #searchButton {
+        background-color: #3498db;
+        color: white;
+        font-weight: bold;
+        padding: 5px;
+        border-radius: 3px;
+    }
+    #searchButton:hover {
+        background-color: #2980b9;
+    }
+    #infoLabel {
+        color: white;
+        font-size: 10pt;
+        padding: 5px;
+    }
+    #resultsArea {
+        background-color: rgba(30,30,30,150);
+        border-radius: 5px;
+    }
+"""
+
 class ManualOfferWidget(QFrame):
     def __init__(self, offer, parent=None):
         super().__init__(parent)
-        self.offer = offer
+        self.offer = None
         self.parent = parent
         
-        self.setStyleSheet("""
-            QFrame { 
-                background-color: rgba(0,0,0,150); 
-                border-radius: 5px; 
-                margin: 2px;
-            }
-            QLabel { 
-                color: white; 
-                font-size: 9pt;
-            }
-            QPushButton { 
-                color: white; 
-                border: none; 
-                border-radius: 3px; 
-                padding: 2px 4px;
-                font-size: 9pt;
-            }
-            #copyButton {
-                background-color: #4CAF50; 
-                min-width: 50px;
-            }
-            #copyButton:hover {
-                background-color: #45a049; 
-            }
-            #removeButton {
-                background-color: #95a5a6;
-                min-width: 60px;
-            }
-            #removeButton:hover {
-                background-color: #7f8c8d;
-            }
-        """)
-        
         layout = QHBoxLayout()
         
         # Etichetta principale
-        main_text = f"{offer.get('display_name')} - {offer.get('price')}p"
-        self.label = QLabel(main_text)
-        self.label.setToolTip(f"Seller: {offer.get('seller')}")
+        self.label = QLabel()
         layout.addWidget(self.label, 1)
         
         # Contenitore per i pulsanti
@@ -83,6 +102,13 @@ class ManualOfferWidget(QFrame):
         layout.addWidget(btn_container, 0)
         
         self.setLayout(layout)
+        self.bind(offer)
+
+    def bind(self, offer):
+        """Collega la riga a un'altra offerta, riusando il widget"""
+        self.offer = offer
+        self.label.setText(f"{offer.get('display_name')} - {offer.get('price')}p")
+        self.label.setToolTip(f"Seller: {offer.get('seller')}")
 
     def copy_message(self):
         seller = self.offer.get('seller') or ""
@@ -90,8 +116,7 @@ class ManualOfferWidget(QFrame):
         pyperclip.copy(msg)
 
     def remove_self(self):
-        self.setParent(None)
-        self.deleteLater()
+        self.parent.release_widget(self)
 
 class ManualSearchTab(QWidget):
     stopItemDisplay = pyqtSignal(str)
@@ -102,6 +127,8 @@ class ManualSearchTab(QWidget):
         self.current_rank = "All"
         self.displayed_offers = {}
         self.stopped_items = set()
+        self.widget_pool = []  # righe nascoste pronte per essere riusate
+        self.setStyleSheet(TAB_STYLESHEET)
         
         layout = QVBoxLayout()
         layout.setContentsMargins(5, 5, 5, 5)
@@ -130,31 +157,20 @@ class ManualSearchTab(QWidget):
         
         # Pulsante di ricerca
         self.search_btn = QPushButton("Search")
-        self.search_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3498db;
-                color: white;
-                font-weight: bold;
-                padding: 5px;
-                border-radius: 3px;
-            }
-            QPushButton:hover {
-                background-color: #2980b9;
-            }
-        """)
+        self.search_btn.setObjectName("searchButton")
         self.search_btn.clicked.connect(self.search_offers)
         layout.addWidget(self.search_btn)
         
         # Etichetta informazioni
         self.info_label = QLabel("Enter the name of an item and press Search")
-        self.info_label.setStyleSheet("color: white; font-size: 10pt; padding: 5px;")
+        self.info_label.setObjectName("infoLabel")
         self.info_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.info_label)
         
         # Area scroll per i risultati
         self.scroll = QScrollArea()
         self.scroll.setWidgetResizable(True)
-        self.scroll.setStyleSheet("background-color: rgba(30,30,30,150); border-radius: 5px;")
+        self.scroll.setObjectName("resultsArea")
         
         self.content = QWidget()
         self.vbox = QVBoxLayout()
@@ -233,13 +249,34 @@ class ManualSearchTab(QWidget):
         except Exception as e:
             self.info_label.setText(f"Connection error: {str(e)}")
     
+    def acquire_widget(self, offer):
+        """Prende una riga dal pool (o ne crea una) e la collega all'offerta"""
+        if self.widget_pool:
+            widget = self.widget_pool.pop()
+            widget.bind(offer)
+        else:
+            widget = ManualOfferWidget(offer, self)
+        self.vbox.addWidget(widget)
+        widget.show()
+        return widget
+
+    def release_widget(self, widget):
+        """Nasconde la riga e la rimette nel pool invece di distruggerla"""
+        widget.hide()
+        self.vbox.removeWidget(widget)
+        widgets = self.displayed_offers.get(widget.offer.get('item'))
+        if widgets and widget in widgets:
+            widgets.remove(widget)
+        widget.offer = None
+        self.widget_pool.append(widget)
+
     def display_offers(self, offers):
-        # Pulisci i risultati precedenti
+        # Rimetti nel pool i risultati precedenti
         for i in reversed(range(self.vbox.count())):
             widget = self.vbox.itemAt(i).widget()
             if widget:
-                widget.setParent(None)
-                widget.deleteLater()
+                self.release_widget(widget)
+        self.displayed_offers = {}
         
         if not offers:
             self.info_label.setText("No offers found")
@@ -254,8 +291,7 @@ class ManualSearchTab(QWidget):
         
         # Aggiungi i widget delle offerte
         for offer in sorted_offers[:displayed_count]:
-            widget = ManualOfferWidget(offer, self)
-            self.vbox.addWidget(widget)
+            widget = self.acquire_widget(offer)
             item_url = offer.get('item')
             if item_url not in self.displayed_offers:
                 self.displayed_offers[item_url] = []
@@ -265,9 +301,8 @@ class ManualSearchTab(QWidget):
         self.stopped_items.add(item_url)
         # Rimuovi tutti i widget per questo item
         if item_url in self.displayed_offers:
-            for widget in self.displayed_offers[item_url]:
-                widget.setParent(None)
-                widget.deleteLater()
+            for widget in list(self.displayed_offers[item_url]):
+                self.release_widget(widget)
             del self.displayed_offers[item_url]
         
         self.info_label.setText(f"Viewing interrupted for: {item_url}")
@@ -1,20 +1,31 @@
 import sys
 import time
+_PROCESS_START = time.perf_counter()  # per il resoconto dei tempi di avvio
 import requests
+from requests.adapters import HTTPAdapter
 import warnings
 from PyQt5.QtWidgets import (QApplication, QWidget, QLabel, QVBoxLayout, QPushButton, 
-                             QHBoxLayout, QScrollArea, QFrame, QDialog, QFormLayout, 
+                             QHBoxLayout, QScrollArea, QDialog, QFormLayout, 
                              QLineEdit, QComboBox, QDialogButtonBox, QListWidget, 
                              QListWidgetItem, QAbstractItemView, QSizePolicy, QShortcut,
-                             QTabWidget, QMessageBox, QStyle)
-from PyQt5.QtCore import Qt, QTimer, QPoint, QSize, QPropertyAnimation, QEasingCurve, pyqtSignal, QObject
-from PyQt5.QtGui import QCursor, QPixmap, QKeySequence
-import pyperclip
+                             QTabWidget, QMessageBox, QStyle, QListView, QStyledItemDelegate,
+                             QToolTip, QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog)
+from PyQt5.QtCore import (Qt, QTimer, QPoint, QSize, QPropertyAnimation, QEasingCurve, pyqtSignal, QObject,
+                          QAbstractListModel, QModelIndex, QRect, QEvent, QPointF)
+from PyQt5.QtGui import QCursor, QPixmap, QKeySequence, QPainter, QColor, QFont, QFontMetrics, QPolygonF, QPen
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import json
-from urllib.parse import urlencode
 import os
+import random
 import socket
+import bisect
+import csv
+import struct
+from array import array
+import sqlite3
+from collections import OrderedDict, namedtuple, deque
+# rapidfuzz e pyperclip sono importati al primo uso: non servono all'avvio
 
 def resource_path(relative_path):
     """Ottieni il percorso assoluto per le risorse, funziona sia in dev che in .exe"""
@@ -28,9 +39,86 @@ def resource_path(relative_path):
 # Ignora tutti i warning di deprecazione
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
-BACKEND_URL = "https://wmsniper.onrender.com"
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+# Backend: quello pubblico, oppure ad es. http://127.0.0.1:8080 con local_backend.py
+BACKEND_URL = os.environ.get("WMSNIPER_BACKEND_URL") or "https://wmsniper.onrender.com"
 CHECK_INTERVAL = 5  # secondi
 
+# Parametri del client HTTP condiviso (sovrascrivibili da variabili d'ambiente)
+HTTP_POOL_SIZE = _env_int("WMSNIPER_HTTP_POOL_SIZE", 4)  # connessioni keep-alive per host
+HTTP_CONNECT_TIMEOUT = _env_float("WMSNIPER_HTTP_CONNECT_TIMEOUT", 3.05)
+HTTP_READ_TIMEOUT = _env_float("WMSNIPER_HTTP_READ_TIMEOUT", 5)
+HTTP_SLOW_READ_TIMEOUT = _env_float("WMSNIPER_HTTP_SLOW_READ_TIMEOUT", 10)  # /manual_offers
+
+# Ricezione push dei match (Server-Sent Events); se non disponibile si usa il polling
+MATCH_STREAM_ENABLED = os.environ.get("WMSNIPER_MATCH_STREAM", "1") != "0"
+STREAM_IDLE_TIMEOUT = _env_float("WMSNIPER_STREAM_IDLE_TIMEOUT", 45)  # il backend invia keep-alive
+STREAM_MAX_BACKOFF = _env_float("WMSNIPER_STREAM_MAX_BACKOFF", 60)
+
+# Pianificazione adattiva dei poll
+POLL_LATENCY_BUDGET = _env_float("WMSNIPER_POLL_LATENCY_BUDGET", CHECK_INTERVAL)  # max secondi tra due poll a overlay visibile e attivo
+POLL_BANDWIDTH_BUDGET = _env_float("WMSNIPER_POLL_BANDWIDTH_BUDGET", 30)  # max richieste periodiche al minuto, in totale
+POLL_BOOST_DURATION = 60      # secondi di intervallo minimo dopo start_watch o nuovi match
+POLL_IDLE_AFTER = 6           # poll senza novità prima di considerare il task inattivo
+POLL_IDLE_FACTOR = 4
+POLL_HIDDEN_FACTOR = 3
+
+# Inserimento a blocchi delle raffiche di match, per non bloccare l'overlay
+FRAME_BUDGET_MS = _env_float("WMSNIPER_FRAME_BUDGET_MS", 8)  # tempo massimo per tick di event loop
+ROW_CHUNK = 25                # righe inserite tra un controllo del tempo e l'altro
+
+# Stato dei match (notificati/soppressi) su disco, ripreso al riavvio
+MATCH_STATE_TTL = _env_float("WMSNIPER_MATCH_STATE_TTL", 3 * 24 * 3600)  # secondi dall'ultima volta vista
+MATCH_STATE_MAX_KEYS = _env_int("WMSNIPER_MATCH_STATE_MAX_KEYS", 20000)
+MATCH_STATE_FLUSH_INTERVAL = 15      # secondi tra una scrittura su disco e l'altra
+MATCH_STATE_COMPACT_INTERVAL = 3600  # secondi tra una compattazione e l'altra
+
+# Tab Warframe Market: item seguiti insieme
+MANUAL_MAX_PINS = _env_int("WMSNIPER_MANUAL_MAX_PINS", 6)
+MANUAL_REFRESH_INTERVAL = 10  # secondi, per ogni item seguito
+OFFER_CACHE_TTL = _env_float("WMSNIPER_OFFER_CACHE_TTL", 6 * 3600)  # secondi
+OFFER_CACHE_MAX_ENTRIES = _env_int("WMSNIPER_OFFER_CACHE_MAX_ENTRIES", 200)
+OFFER_CACHE_SAVE_DELAY = 30   # secondi tra una modifica e la scrittura su disco
+
+# Storico prezzi per item: un campione (timestamp, minimo, mediana, numero) per poll
+HISTORY_STEP = 60             # secondi: i poll più ravvicinati aggiornano lo stesso campione
+HISTORY_POINTS = _env_int("WMSNIPER_HISTORY_POINTS", 1440)     # campioni per item (24h a passo 60s)
+HISTORY_MAX_ITEMS = _env_int("WMSNIPER_HISTORY_MAX_ITEMS", 300)
+HISTORY_WINDOW = 24 * 3600    # secondi: finestra di sparkline e mediana dei badge
+HISTORY_MIN_SAMPLES = 3       # sotto questo numero di campioni niente sparkline né badge
+HISTORY_BADGE_MIN_PCT = 5     # badge solo se il prezzo è almeno così sotto la mediana
+HISTORY_SAVE_INTERVAL = 60    # secondi tra una scrittura su disco e l'altra
+SPARKLINE_POINTS = 48
+
+# Watchlist: avvio/stop in blocco
+WATCH_BATCH_MAX = 100         # voci per richiesta agli endpoint batch
+WATCH_CONCURRENCY = _env_int("WMSNIPER_WATCH_CONCURRENCY", HTTP_POOL_SIZE)  # richieste singole in parallelo se il batch non c'è
+
+# Metriche (tab Stats nascosto, Ctrl+Shift+S)
+METRICS_WINDOW = 1000         # campioni recenti per serie su cui calcolare i percentili
+
+# Avvio rapido: icona subito, identità in background, overlay costruito dopo il primo giro di event loop
+LAZY_STARTUP = os.environ.get("WMSNIPER_LAZY_STARTUP", "1") != "0"
+
+# Cartella dei dati locali (catalogo, cache, stato)
+DATA_DIR = os.environ.get("WMSNIPER_DATA_DIR") or os.path.join(os.path.expanduser("~"), ".wmsniper")
+
+def data_path(name):
+    """Percorso di un file nella cartella dati, creandola se serve"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
+
 def get_local_ip():
     """Ottieni l'IP locale della macchina"""
     try:
@@ -46,35 +134,1444 @@ def get_local_ip():
         except Exception:
             return "127.0.0.1"  # Ultimo fallback
 
-# Worker semplice per eseguire richieste HTTP fuori dal thread UI
-class HttpWorker(QObject):
-    success = pyqtSignal(object)
-    error = pyqtSignal(object)
+def load_identity():
+    """user_id salvato all'ultimo avvio, o None"""
+    try:
+        with open(data_path("identity.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get('user_id') or None
+    except (OSError, ValueError):
+        return None
 
-    def __init__(self, parent=None):
+def save_identity(user_id):
+    try:
+        with open(data_path("identity.json"), "w", encoding="utf-8") as f:
+            json.dump({'user_id': user_id}, f)
+    except OSError as e:
+        print("Identity save error:", e)
+
+class MetricSeries:
+    """Contatori e ultimi campioni (in secondi) di una serie"""
+    __slots__ = ('count', 'errors', 'bytes', 'samples', 'total')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=METRICS_WINDOW)
+
+    def summary(self):
+        samples = sorted(self.samples)
+        def _pct(p):
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+        return {'count': self.count, 'errors': self.errors, 'bytes': self.bytes,
+                'p50_ms': _pct(0.50), 'p95_ms': _pct(0.95), 'p99_ms': _pct(0.99),
+                'max_ms': round(samples[-1] * 1000, 2) if samples else None,
+                'avg_ms': round(self.total / self.count * 1000, 2) if self.count else None}
+
+
+class Metrics:
+    """
+    Registro delle metriche del processo, aggiornato da thread diversi:
+    - request: latenza, errori e byte per endpoint (nel BackendClient)
+    - slot: durata dei callback eseguiti sul thread UI
+    - render: ritardo tra richiesta (o evento) e righe inserite
+    """
+
+    KINDS = ('request', 'slot', 'render')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.series = {kind: {} for kind in self.KINDS}
+
+    def observe(self, kind, name, seconds=None, error=False, nbytes=0):
+        with self._lock:
+            series = self.series[kind].get(name)
+            if series is None:
+                series = self.series[kind][name] = MetricSeries()
+            series.count += 1
+            series.bytes += nbytes
+            if error:
+                series.errors += 1
+            if seconds is not None:
+                series.total += seconds
+                series.samples.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {kind: {name: series.summary() for name, series in sorted(self.series[kind].items())}
+                    for kind in self.KINDS}
+
+    def export_jsonl(self, path):
+        """Aggiunge al file una riga JSON per ogni serie; restituisce le righe scritte"""
+        now = time.time()
+        lines = [json.dumps({'ts': round(now, 3), 'kind': kind, 'name': name, **summary})
+                 for kind, series in self.snapshot().items() for name, summary in series.items()]
+        with open(path, "a", encoding="utf-8") as f:
+            for line in lines:
+                f.write(line + "\n")
+        return len(lines)
+
+
+METRICS = Metrics()
+
+
+class BackendClient:
+    """Client HTTP condiviso dal processo: pool keep-alive, header e timeout di default"""
+
+    def __init__(self, base_url=BACKEND_URL, pool_size=HTTP_POOL_SIZE,
+                 connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        # pool_block: oltre pool_size richieste verso lo stesso host si attende
+        # una connessione libera invece di aprirne di nuove
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def set_user_id(self, user_id):
+        if user_id:
+            self.session.headers['X-User-ID'] = user_id
+        else:
+            self.session.headers.pop('X-User-ID', None)
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def request(self, method, path, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        elif not isinstance(timeout, tuple):
+            timeout = (self.timeout[0], timeout)
+        start = time.perf_counter()
+        try:
+            resp = self.session.request(method, self.url(path), timeout=timeout, **kwargs)
+        except Exception:
+            METRICS.observe('request', path, time.perf_counter() - start, error=True)
+            raise
+        # Per gli stream conta solo l'apertura: il corpo arriva nel tempo
+        if kwargs.get('stream'):
+            nbytes = 0
+        else:
+            nbytes = len(resp.content or b"")
+        METRICS.observe('request', path, time.perf_counter() - start,
+                        error=resp.status_code >= 400, nbytes=nbytes)
+        return resp
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Restituisce il BackendClient del processo, creandolo al primo uso"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = BackendClient()
+        return _client
+
+class _Job:
+    __slots__ = ('key', 'group', 'seq', 'future', 'callbacks', 'cancelled')
+
+    def __init__(self, key, group, seq):
+        self.key = key
+        self.group = group
+        self.seq = seq
+        self.future = None
+        self.callbacks = []
+        self.cancelled = False
+
+
+class RequestExecutor(QObject):
+    """
+    Pool limitato di thread per le richieste HTTP, posseduto dall'overlay.
+    - stessa key in volo: la nuova richiesta si aggancia a quella pendente (single-flight)
+    - stesso group: una nuova richiesta annulla quella precedente (superata)
+    - i risultati arrivano sul thread Qt in ordine; quelli superati vengono scartati
+    """
+    _finished = pyqtSignal(object, object, object)
+
+    def __init__(self, max_workers=HTTP_POOL_SIZE, parent=None):
+        super().__init__(parent)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wmsniper-http")
+        self._inflight = {}   # key -> _Job
+        self._groups = {}     # group -> _Job più recente
+        self._delivered = {}  # group -> seq dell'ultimo risultato consegnato
+        self._seq = 0
+        self._closed = False
+        # Emesso dai thread del pool, ricevuto nel thread Qt (connessione queued)
+        self._finished.connect(self._deliver)
+
+    def submit(self, key, func, on_success=None, on_error=None, group=None):
+        if self._closed:
+            return None
+        job = self._inflight.get(key)
+        if job is not None:
+            job.callbacks.append((on_success, on_error))
+            return job
+        if group is not None:
+            previous = self._groups.get(group)
+            if previous is not None:
+                self._cancel_job(previous)
+        self._seq += 1
+        job = _Job(key, group, self._seq)
+        job.callbacks.append((on_success, on_error))
+        self._inflight[key] = job
+        if group is not None:
+            self._groups[group] = job
+        job.future = self._pool.submit(self._run, job, func)
+        return job
+
+    def cancel(self, key):
+        job = self._inflight.get(key)
+        if job is not None:
+            self._cancel_job(job)
+
+    def is_pending(self, key):
+        return key in self._inflight
+
+    def _cancel_job(self, job):
+        job.cancelled = True
+        if job.future is not None:
+            job.future.cancel()
+        if self._inflight.get(job.key) is job:
+            del self._inflight[job.key]
+        if job.group is not None and self._groups.get(job.group) is job:
+            del self._groups[job.group]
+
+    def _run(self, job, func):
+        if job.cancelled:
+            return
+        try:
+            result = func()
+        except Exception as e:
+            self._finished.emit(job, None, e)
+            return
+        self._finished.emit(job, result, None)
+
+    def _deliver(self, job, result, error):
+        if self._inflight.get(job.key) is job:
+            del self._inflight[job.key]
+        if job.group is not None and self._groups.get(job.group) is job:
+            del self._groups[job.group]
+        if job.cancelled or self._closed:
+            return
+        if job.group is not None:
+            if job.seq < self._delivered.get(job.group, 0):
+                return
+            self._delivered[job.group] = job.seq
+        start = time.perf_counter()
+        for on_success, on_error in job.callbacks:
+            if error is None:
+                if on_success:
+                    on_success(result)
+            elif on_error:
+                on_error(error)
+        METRICS.observe('slot', self.slot_name(job.key), time.perf_counter() - start,
+                        error=error is not None)
+
+    @staticmethod
+    def slot_name(key):
+        # ('GET', '/matches', ...) -> "GET /matches"
+        if isinstance(key, tuple) and len(key) >= 2:
+            return f"{key[0]} {key[1]}"
+        return str(key)
+
+    def shutdown(self):
+        self._closed = True
+        for job in list(self._inflight.values()):
+            self._cancel_job(job)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+OfferKey = namedtuple('OfferKey', 'item seller price')
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Offer:
+    """
+    Offerta decodificata una sola volta dal JSON del backend (nei thread del pool).
+    Item e venditore sono stringhe internate: si ripetono in migliaia di match.
+    """
+    __slots__ = ('item', 'seller', 'price', 'display_name', 'key')
+
+    def __init__(self, item, seller, price, display_name):
+        self.item = _intern(item)
+        self.seller = _intern(seller)
+        self.price = price
+        self.display_name = _intern(display_name)
+        self.key = OfferKey(self.item, self.seller, price)
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data.get('item'), data.get('seller'), data.get('price'), data.get('display_name'))
+
+    def __eq__(self, other):
+        return isinstance(other, Offer) and self.key == other.key and self.display_name == other.display_name
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"Offer({self.item!r}, {self.seller!r}, {self.price!r})"
+
+
+def offer_price_key(offer):
+    """Chiave di ordinamento per prezzo: le offerte senza prezzo vanno in fondo"""
+    return 999999 if offer.price is None else offer.price
+
+
+def parse_offers(payload):
+    return [Offer.from_json(d) for d in payload or () if isinstance(d, dict)]
+
+
+class MatchDelta:
+    """
+    Patch minima per il tab Sniper: offerte aggiunte e chiavi rimosse.
+    Dopo una risincronizzazione completa present contiene tutte le chiavi attive:
+    le righe mostrate che non ne fanno parte vanno rimosse.
+    """
+    __slots__ = ('added', 'removed', 'present')
+
+    def __init__(self, added=(), removed=(), present=None):
+        self.added = added
+        self.removed = removed
+        self.present = present
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.present is not None)
+
+
+class PriceSeries:
+    """Ring buffer di campioni su array tipizzati, dal più vecchio (start) al più recente"""
+    __slots__ = ('ts', 'low', 'median', 'count', 'start', 'version')
+
+    def __init__(self):
+        self.ts = array('I')
+        self.low = array('I')
+        self.median = array('I')
+        self.count = array('I')
+        self.start = 0
+        self.version = 0
+
+    def __len__(self):
+        return len(self.ts)
+
+    def add(self, ts, low, median, count, step, capacity):
+        n = len(self.ts)
+        self.version += 1
+        if n:
+            last = (self.start - 1) % n
+            if ts - self.ts[last] < step:
+                # stesso passo: il campione si aggiorna invece di aggiungerne uno
+                self.low[last] = min(self.low[last], low)
+                self.median[last] = median
+                self.count[last] = count
+                return
+        if n < capacity:
+            self.ts.append(ts)
+            self.low.append(low)
+            self.median.append(median)
+            self.count.append(count)
+            return
+        i = self.start
+        self.ts[i], self.low[i], self.median[i], self.count[i] = ts, low, median, count
+        self.start = (i + 1) % n
+
+    def ordered(self):
+        """Gli array in ordine cronologico (copie)"""
+        s = self.start
+        return [a[s:] + a[:s] for a in (self.ts, self.low, self.median, self.count)]
+
+
+class PriceSummary:
+    __slots__ = ('median', 'spark', 'samples')
+
+    def __init__(self, median, spark, samples):
+        self.median = median    # mediana delle mediane nella finestra
+        self.spark = spark      # minimi ricampionati, normalizzati 0..1
+        self.samples = samples
+
+
+class PriceHistory:
+    """
+    Storico compatto dei prezzi osservati per item: un PriceSeries per item,
+    al massimo max_items (escono i meno aggiornati) da HISTORY_POINTS campioni.
+    record() gira nei worker, summary() nel thread UI (ricalcolata solo se la serie cambia).
+    Su disco: intestazione, poi per item nome e i quattro array in little endian.
+    """
+    MAGIC = b"WMPH1"
+
+    def __init__(self, path, capacity=HISTORY_POINTS, max_items=HISTORY_MAX_ITEMS, step=HISTORY_STEP):
+        self.path = path
+        self.capacity = capacity
+        self.max_items = max_items
+        self.step = step
+        self.series = OrderedDict()  # item -> PriceSeries, dal meno aggiornato
+        self.dirty = False
+        self._summaries = {}  # item -> (versione, finestra, PriceSummary o None)
+        self._lock = threading.Lock()
+
+    def record(self, item, prices, now=None):
+        if not item:
+            return
+        ordered = sorted(p for p in prices if p is not None)
+        n = len(ordered)
+        if not n:
+            return
+        ts = int(now or time.time())
+        low = int(ordered[0])
+        median = int(ordered[(n - 1) // 2])
+        with self._lock:
+            series = self.series.get(item)
+            if series is None:
+                series = self.series[item] = PriceSeries()
+                while len(self.series) > self.max_items:
+                    old, _ = self.series.popitem(last=False)
+                    self._summaries.pop(old, None)
+            else:
+                self.series.move_to_end(item)
+            series.add(ts, low, median, min(n, 0xFFFFFFFF), self.step, self.capacity)
+            self.dirty = True
+
+    def summary(self, item, now=None):
+        """PriceSummary delle ultime 24h, o None se i campioni sono troppo pochi"""
+        now = now or time.time()
+        window = int(now // self.step)
+        with self._lock:
+            series = self.series.get(item)
+            if series is None:
+                return None
+            cached = self._summaries.get(item)
+            if cached is not None and cached[0] == series.version and cached[1] == window:
+                return cached[2]
+            version = series.version
+            ts, low, median, _ = series.ordered()
+        first = bisect.bisect_left(ts, now - HISTORY_WINDOW)
+        lows = low[first:]
+        result = None
+        if len(lows) >= HISTORY_MIN_SAMPLES:
+            medians = sorted(median[first:])
+            result = PriceSummary(medians[(len(medians) - 1) // 2], self._sparkline(lows), len(lows))
+        with self._lock:
+            self._summaries[item] = (version, window, result)
+        return result
+
+    @staticmethod
+    def _sparkline(values):
+        # minimo per gruppo di campioni, poi scala 0..1
+        n = len(values)
+        if n > SPARKLINE_POINTS:
+            values = [min(values[i * n // SPARKLINE_POINTS:(i + 1) * n // SPARKLINE_POINTS])
+                      for i in range(SPARKLINE_POINTS)]
+        lo, hi = min(values), max(values)
+        span = (hi - lo) or 1
+        return [(v - lo) / span for v in values]
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+        if not data.startswith(self.MAGIC):
+            return
+        pos = len(self.MAGIC)
+        loaded = OrderedDict()
+        try:
+            while pos < len(data):
+                (name_len,) = struct.unpack_from("<H", data, pos)
+                pos += 2
+                item = sys.intern(data[pos:pos + name_len].decode("utf-8"))
+                pos += name_len
+                (n,) = struct.unpack_from("<I", data, pos)
+                pos += 4
+                series = PriceSeries()
+                for a in (series.ts, series.low, series.median, series.count):
+                    a.frombytes(data[pos:pos + n * 4])
+                    pos += n * 4
+                    if sys.byteorder == "big":
+                        a.byteswap()
+                if len(series.ts) != n:
+                    raise ValueError("truncated")
+                if n > self.capacity:
+                    for a in (series.ts, series.low, series.median, series.count):
+                        del a[:n - self.capacity]
+                loaded[item] = series
+        except (struct.error, ValueError) as e:
+            print("Price history load error:", e)
+        while len(loaded) > self.max_items:
+            loaded.popitem(last=False)
+        with self._lock:
+            self.series = loaded
+            self._summaries.clear()
+
+    def save(self):
+        """Scrive su disco se ci sono modifiche; chiamabile da un worker"""
+        with self._lock:
+            if not self.dirty:
+                return False
+            snapshot = [(item, series.ordered()) for item, series in self.series.items()]
+            self.dirty = False
+        parts = [self.MAGIC]
+        for item, arrays in snapshot:
+            name = item.encode("utf-8")
+            parts.append(struct.pack("<H", len(name)) + name + struct.pack("<I", len(arrays[0])))
+            for a in arrays:
+                if sys.byteorder == "big":
+                    a.byteswap()  # copie: l'originale resta intatto
+                parts.append(a.tobytes())
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(tmp_path, self.path)
+        return True
+
+
+_price_histories = {}
+
+def get_price_history(source):
+    """
+    Storico condiviso per fonte: 'market' (offerte complete di /manual_offers)
+    o 'matches' (solo le offerte sotto il prezzo massimo delle ricerche).
+    """
+    with _client_lock:
+        history = _price_histories.get(source)
+        if history is None:
+            history = _price_histories[source] = PriceHistory(data_path(f"price_history_{source}.bin"))
+            history.load()
+        return history
+
+
+def _cursor_after(cursor, seq):
+    """True se il cursore di una risposta include già l'evento seq (confronto numerico se possibile)"""
+    if cursor is None or seq is None:
+        return False
+    try:
+        return int(seq) <= int(cursor)
+    except (TypeError, ValueError):
+        return False
+
+
+class MatchSync:
+    """
+    Stato del polling incrementale di /matches, lato worker.
+    Con uno storico, ogni item toccato da un delta vi registra i prezzi attivi.
+    Protocollo:
+    - If-None-Match con l'ultimo ETag: 304 = nessuna novità
+    - ?since=<cursor>: {"cursor", "added", "removed"} con le sole differenze
+    - cursore perso (410 o "reset": true): si torna alla sincronizzazione completa
+    Un backend che risponde con la semplice lista continua a funzionare.
+    Lo snapshot dei match attivi vive qui: ogni risposta (e ogni evento dello
+    stream) diventa un MatchDelta già calcolato, il thread UI applica e basta.
+    """
+
+    def __init__(self, client, history=None):
+        self.client = client
+        self.history = history
+        self.etag = None
+        self.cursor = None
+        self.snapshot = {}  # OfferKey -> Offer attiva sul backend
+        self.prices = {}    # item -> {OfferKey: prezzo} dello snapshot
+        self._journal = None  # eventi dello stream arrivati durante una sincronizzazione completa
+        self._lock = threading.Lock()
+        self._reset_requested = False
+        self._resync = False
+
+    def reset(self):
+        """Forza una sincronizzazione completa al prossimo poll"""
+        self._reset_requested = True
+
+    def fetch(self):
+        """Restituisce un MatchDelta, oppure None se nulla è cambiato"""
+        for _ in range(3):
+            if self._reset_requested:
+                self._reset_requested = False
+                self._resync = True
+                self.etag = None
+                self.cursor = None
+            try:
+                delta = self._fetch_once()
+            finally:
+                with self._lock:
+                    self._journal = None
+            if delta is not False and not self._reset_requested:
+                return delta
+        raise Exception("Unable to resync /matches")
+
+    def _fetch_once(self):
+        headers = {}
+        params = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.cursor:
+            params['since'] = self.cursor
+        else:
+            # Sincronizzazione completa: gli eventi dello stream che arrivano nel frattempo
+            # vanno riapplicati sopra la risposta, altrimenti la sostituzione li perde
+            with self._lock:
+                self._journal = []
+        resp = self.client.get("/matches", params=params, headers=headers)
+        if resp.status_code == 304:
+            return None
+        if resp.status_code == 410:
+            # Cursore scaduto lato backend: ricomincia da capo
+            self.reset()
+            return False
+        resp.raise_for_status()
+        body = resp.json()
+        self.etag = resp.headers.get('ETag')
+        if isinstance(body, list):
+            # Backend senza supporto ai delta
+            self.cursor = None
+            return self._apply_full(parse_offers(body))
+        if body.get('reset'):
+            self.reset()
+            return False
+        self.cursor = body.get('cursor')
+        if 'matches' in body:
+            return self._apply_full(parse_offers(body['matches']), self.cursor)
+        return self.apply(parse_offers(body.get('added')), parse_offers(body.get('removed')))
+
+    def _apply_full(self, offers, cursor=None):
+        current = {}
+        for o in offers:
+            current.setdefault(o.key, o)
+        with self._lock:
+            # eventi dello stream più recenti della risposta (o tutti, senza cursore)
+            for seq, added, removed in self._journal or ():
+                if _cursor_after(cursor, seq):
+                    continue
+                for o in removed:
+                    current.pop(o.key, None)
+                for o in added:
+                    current.setdefault(o.key, o)
+            self._journal = None
+            prices = {}
+            for k in current:
+                prices.setdefault(k.item, {})[k] = k.price
+            if self._resync:
+                self._resync = False
+                delta = MatchDelta(added=list(current.values()), present=frozenset(current))
+            else:
+                previous = self.snapshot
+                delta = MatchDelta(added=[o for k, o in current.items() if k not in previous],
+                                   removed=[k for k in previous if k not in current])
+            self.snapshot = current
+            self.prices = prices
+            self._record(prices)
+        return delta
+
+    def apply(self, added, removed, seq=None):
+        """
+        Applica differenze (poll o stream) allo snapshot; restituisce solo quelle nuove.
+        Una chiave presente sia in added che in removed (delta non netto) viene ignorata:
+        l'ordine degli eventi è perso, e così lo snapshot resta com'era per quella chiave.
+        seq: id dell'evento dello stream, per riapplicarlo dopo una sincronizzazione completa.
+        """
+        both = {o.key for o in removed}.intersection(o.key for o in added)
+        if both:
+            added = [o for o in added if o.key not in both]
+            removed = [o for o in removed if o.key not in both]
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((seq, added, removed))
+            snapshot = self.snapshot
+            prices = self.prices
+            gone = [o.key for o in removed if snapshot.pop(o.key, None) is not None]
+            new = []
+            for o in added:
+                if o.key not in snapshot:
+                    snapshot[o.key] = o
+                    new.append(o)
+            touched = set()
+            for k in gone:
+                item_prices = prices.get(k.item)
+                if item_prices is not None:
+                    item_prices.pop(k, None)
+                    if not item_prices:
+                        del prices[k.item]
+                touched.add(k.item)
+            for o in new:
+                prices.setdefault(o.item, {})[o.key] = o.price
+                touched.add(o.item)
+            self._record({item: prices[item] for item in touched if item in prices})
+        return MatchDelta(added=new, removed=gone)
+
+    def _record(self, prices):
+        # sotto self._lock: i dict dei prezzi cambiano con ogni delta
+        if self.history is not None:
+            for item, item_prices in prices.items():
+                self.history.record(item, item_prices.values())
+
+
+def iter_sse_events(lines):
+    """Converte le righe di uno stream text/event-stream in tuple (event, data, id)"""
+    event, data, event_id = None, [], None
+    for line in lines:
+        if line is None:
+            continue
+        if not line:
+            if data or event:
+                yield (event or "message", "\n".join(data), event_id)
+            event, data, event_id = None, [], None
+            continue
+        if line.startswith(":"):
+            continue  # commento / keep-alive
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            event = value
+        elif field == "data":
+            data.append(value)
+        elif field == "id":
+            event_id = value
+
+
+class MatchStream(QObject):
+    """
+    Connessione persistente a /matches/stream (SSE) su un thread dedicato.
+    Eventi: "added" / "removed" (un match o una lista), "reset" (il token di
+    ripresa non è più valido: serve una sincronizzazione completa).
+    Alla riconnessione invia Last-Event-ID per riprendere da dove si era rimasti.
+    """
+    delta = pyqtSignal(object)        # MatchDelta con le sole differenze
+    connected = pyqtSignal(bool)      # True se la connessione ha ripreso da un token
+    disconnected = pyqtSignal()
+    resync = pyqtSignal()
+    unavailable = pyqtSignal()        # il backend non supporta lo streaming
+
+    def __init__(self, client, sync, parent=None):
         super().__init__(parent)
+        self.client = client
+        self.sync = sync
+        self.last_event_id = None
+        self._stop = threading.Event()
         self._thread = None
+        self._response = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="wmsniper-stream", daemon=True)
+        self._thread.start()
 
-    def run(self, func):
-        def _target():
+    def stop(self):
+        self._stop.set()
+        resp = self._response
+        if resp is not None:
             try:
-                result = func()
-                self.success.emit(result)
+                resp.close()  # sblocca la lettura in corso
+            except Exception:
+                pass
+        self._thread = None
+
+    def _loop(self):
+        failures = 0
+        while not self._stop.is_set():
+            headers = {'Accept': 'text/event-stream'}
+            if self.last_event_id:
+                headers['Last-Event-ID'] = self.last_event_id
+            try:
+                resp = self.client.get("/matches/stream", headers=headers, stream=True,
+                                       timeout=STREAM_IDLE_TIMEOUT)
+                if resp.status_code in (404, 405, 501):
+                    resp.close()
+                    self.unavailable.emit()
+                    return
+                resp.raise_for_status()
+                self._response = resp
+                self.connected.emit(bool(self.last_event_id))
+                failures = 0
+                for event, data, event_id in iter_sse_events(resp.iter_lines(decode_unicode=True)):
+                    if self._stop.is_set():
+                        break
+                    self._handle(event, data, event_id)
+                    if event_id:
+                        self.last_event_id = event_id
+                resp.close()
             except Exception as e:
-                self.error.emit(e)
-        t = threading.Thread(target=_target, daemon=True)
-        self._thread = t
-        t.start()
+                if not self._stop.is_set():
+                    print("Match stream error:", e)
+            finally:
+                self._response = None
+            if self._stop.is_set():
+                return
+            failures += 1
+            self.disconnected.emit()
+            # Backoff esponenziale con jitter prima di riconnettersi
+            delay = min(STREAM_MAX_BACKOFF, 2 ** min(failures, 6))
+            self._stop.wait(delay * random.uniform(0.5, 1.0))
+
+    def _handle(self, event, data, seq=None):
+        if event == "reset":
+            self.last_event_id = None
+            self.resync.emit()
+            return
+        if event not in ("added", "removed"):
+            return
+        try:
+            payload = json.loads(data) if data else []
+        except ValueError:
+            return
+        if isinstance(payload, dict):
+            payload = [payload]
+        if event == "added":
+            delta = self.sync.apply(parse_offers(payload), (), seq)
+        else:
+            delta = self.sync.apply((), parse_offers(payload), seq)
+        if delta:
+            self.delta.emit(delta)
+
+
+class PollTask:
+    __slots__ = ('name', 'callback', 'base', 'min_interval', 'max_interval', 'is_visible',
+                 'is_active', 'priority', 'timer', 'failures', 'idle_polls', 'boost_until', 'paused', 'last_run')
+
+    def __init__(self, name, callback, base, min_interval, max_interval, is_visible, is_active, priority=False):
+        self.name = name
+        self.callback = callback
+        self.base = base
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.is_visible = is_visible
+        self.is_active = is_active
+        self.priority = priority
+        self.timer = None
+        self.failures = 0
+        self.idle_polls = 0
+        self.boost_until = 0.0
+        self.paused = False
+        self.last_run = 0.0
+
+
+class PollScheduler(QObject):
+    """
+    Possiede tutti i fetch periodici dell'overlay e ne adatta l'intervallo:
+    - rallenta se l'overlay è nascosto, se non arrivano novità o se il backend fallisce (con jitter)
+    - accelera subito dopo start_watch o quando stanno arrivando match
+    - rispetta i budget di latenza e di banda configurati: se la somma delle frequenze
+      reali supera il budget di banda rallentano in proporzione solo i task non prioritari,
+      con la banda lasciata libera da quelli prioritari (es. /matches)
+    """
+
+    def __init__(self, latency_budget=POLL_LATENCY_BUDGET, bandwidth_budget=POLL_BANDWIDTH_BUDGET, parent=None):
+        super().__init__(parent)
+        self.latency_budget = latency_budget
+        self.bandwidth_budget = bandwidth_budget
+        self.tasks = {}
+
+    def register(self, name, callback, base, min_interval=None, max_interval=None,
+                 is_visible=None, is_active=None, priority=False):
+        task = PollTask(name, callback, base, min_interval or base / 2, max_interval or base * 24,
+                        is_visible or (lambda: True), is_active or (lambda: True), priority)
+        task.timer = QTimer(self)
+        task.timer.setSingleShot(True)
+        task.timer.timeout.connect(lambda: self._run(task))
+        self.tasks[name] = task
+        self._schedule(task, task.base)
+        return task
+
+    def unregister(self, name):
+        task = self.tasks.pop(name, None)
+        if task is not None:
+            task.paused = True
+            task.timer.stop()
+            task.timer.deleteLater()
+
+    def stagger(self, names):
+        """Distribuisce le prossime esecuzioni dei task indicati lungo il loro intervallo"""
+        names = [name for name in names if name in self.tasks and not self.tasks[name].paused]
+        now = time.monotonic()
+        for i, name in enumerate(names, 1):
+            task = self.tasks[name]
+            interval = self.interval(name)
+            delay = interval * i / len(names)
+            # last_run spostato di conseguenza, così report() e refresh() mantengono lo sfasamento
+            task.last_run = now - (interval - delay)
+            task.timer.start(int(delay * 1000))
+
+    def interval(self, name):
+        """Intervallo corrente (secondi, senza jitter) per il task"""
+        task = self.tasks[name]
+        interval = self._natural_interval(task)
+        if self.bandwidth_budget and not task.priority:
+            reserved = other = 0.0
+            for t in self.tasks.values():
+                if not t.paused or t is task:
+                    rate = 60.0 / self._natural_interval(t)
+                    if t.priority:
+                        reserved += rate
+                    else:
+                        other += rate
+            available = self.bandwidth_budget - reserved
+            if reserved + other > self.bandwidth_budget:
+                interval = interval * other / available if available > 0 else task.max_interval
+        return max(task.min_interval, min(interval, task.max_interval))
+
+    def _natural_interval(self, task):
+        """Intervallo dato da attività, visibilità, errori e latenza, prima del budget di banda"""
+        now = time.monotonic()
+        active = task.is_active() and task.idle_polls < POLL_IDLE_AFTER
+        visible = task.is_visible()
+        if task.boost_until > now:
+            interval = task.min_interval
+        else:
+            interval = task.base
+            if not active:
+                interval *= POLL_IDLE_FACTOR
+            if not visible:
+                interval *= POLL_HIDDEN_FACTOR
+        if task.failures:
+            interval = max(interval, task.base * (2 ** min(task.failures, 6)))
+        elif visible and active and self.latency_budget:
+            interval = min(interval, max(self.latency_budget, task.min_interval))
+        return max(task.min_interval, min(interval, task.max_interval))
+
+    def report(self, name, ok=True, activity=False):
+        """Esito dell'ultimo fetch del task: aggiorna backoff e stato di attività"""
+        task = self.tasks.get(name)
+        if task is None:
+            return
+        if ok:
+            task.failures = 0
+        else:
+            task.failures += 1
+        if activity:
+            task.idle_polls = 0
+            task.boost_until = time.monotonic() + POLL_BOOST_DURATION
+        elif ok:
+            task.idle_polls += 1
+        self._reschedule(task)
+
+    def boost(self, name):
+        task = self.tasks.get(name)
+        if task is None:
+            return
+        task.idle_polls = 0
+        task.boost_until = time.monotonic() + POLL_BOOST_DURATION
+        self._reschedule(task)
+
+    def trigger(self, name):
+        """Esegue subito il task e riparte il conteggio"""
+        task = self.tasks.get(name)
+        if task is not None and not task.paused:
+            self._run(task)
+
+    def pause(self, name):
+        task = self.tasks.get(name)
+        if task is not None:
+            task.paused = True
+            task.timer.stop()
+
+    def resume(self, name):
+        task = self.tasks.get(name)
+        if task is not None and task.paused:
+            task.paused = False
+            self._run(task)
+
+    def refresh(self):
+        """Da chiamare quando cambia la visibilità: ricalcola tutti gli intervalli"""
+        for task in self.tasks.values():
+            self._reschedule(task)
+
+    def stop(self):
+        for task in self.tasks.values():
+            task.paused = True
+            task.timer.stop()
+
+    def _run(self, task):
+        task.last_run = time.monotonic()
+        self._schedule(task, self.interval(task.name))
+        task.callback()
+
+    def _schedule(self, task, interval):
+        if task.paused:
+            return
+        if task.failures:
+            # Full jitter sul backoff, per non sincronizzare i client
+            interval = random.uniform(interval / 2, interval)
+        else:
+            interval *= random.uniform(0.9, 1.1)
+        task.timer.start(int(interval * 1000))
+
+    def _reschedule(self, task):
+        if task.paused or not task.last_run:
+            return
+        elapsed = time.monotonic() - task.last_run
+        self._schedule(task, max(0.0, self.interval(task.name) - elapsed))
 
 
 def to_item_url(display_name: str) -> str:
     # Same normalization used by the backend
     return display_name.replace(" ", "_").lower()
 
+def normalize_query(text: str) -> str:
+    return " ".join(text.replace("_", " ").lower().split())
+
+
+class ItemCatalog:
+    """
+    Catalogo degli item scaricato una volta da /catalog e salvato su disco.
+    Il backend risponde 304 se la versione (ETag) non è cambiata.
+    I suggerimenti arrivano da un indice in memoria: prefisso del nome, prefisso
+    delle singole parole e, se non basta, ricerca fuzzy con rapidfuzz.
+    """
+    FILE_NAME = "catalog.json"
+
+    def __init__(self, path=None):
+        self.path = path or data_path(self.FILE_NAME)
+        self.version = None
+        # (nomi normalizzati, (nome, indice) ordinati, (parola, indice) ordinati, items):
+        # una sola tupla, sostituita in blocco da load()/refresh() nei worker
+        self._index = ([], [], [], [])
+
+    @property
+    def items(self):
+        return self._index[3]
+
+    @property
+    def ready(self):
+        return bool(self.items)
+
+    def load(self):
+        """Carica il catalogo salvato su disco (se presente)"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self._set_items(data.get('items') or [], data.get('version'))
+        return self.ready
+
+    def refresh(self, client):
+        """Scarica il catalogo se è cambiato; restituisce True se è stato aggiornato"""
+        headers = {'If-None-Match': self.version} if self.version else {}
+        resp = client.get("/catalog", headers=headers, timeout=HTTP_SLOW_READ_TIMEOUT)
+        if resp.status_code in (304, 404):
+            return False  # invariato, oppure backend senza catalogo
+        resp.raise_for_status()
+        data = resp.json()
+        version = data.get('version') or resp.headers.get('ETag')
+        items = self._set_items(data.get('items') or [], version)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({'version': version, 'items': items}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        return True
+
+    def _set_items(self, items, version):
+        items = [it for it in items if it.get('display_name')]
+        for it in items:
+            it.setdefault('item_url', to_item_url(it['display_name']))
+        names = [normalize_query(it['display_name']) for it in items]
+        by_name = sorted((name, i) for i, name in enumerate(names))
+        by_word = sorted((word, i) for i, name in enumerate(names) for word in set(name.split()))
+        # Un solo assegnamento: il thread UI vede sempre indici e items della stessa versione
+        self._index = (names, by_name, by_word, items)
+        self.version = version
+        return items
+
+    def search(self, query, limit=10):
+        query = normalize_query(query)
+        names, by_name, by_word, items = self._index  # letto una volta sola
+        if not query or not items:
+            return []
+        found = []
+        seen = set()
+
+        def _add(i):
+            if i not in seen:
+                seen.add(i)
+                found.append(i)
+
+        # 1. Il nome inizia con la query
+        pos = bisect.bisect_left(by_name, (query, -1))
+        while pos < len(by_name) and len(found) < limit and by_name[pos][0].startswith(query):
+            _add(by_name[pos][1])
+            pos += 1
+
+        # 2. Ogni parola della query è il prefisso di una parola del nome:
+        #    si parte dalla parola con meno candidati
+        if len(found) < limit:
+            words = query.split()
+            lo, hi = min(((bisect.bisect_left(by_word, (w, -1)), bisect.bisect_left(by_word, (w + "\uffff", -1)))
+                          for w in words), key=lambda r: r[1] - r[0])
+            for pos in range(lo, hi):
+                if len(found) >= limit:
+                    break
+                i = by_word[pos][1]
+                if i in seen:
+                    continue
+                name_words = names[i].split()
+                if all(any(w.startswith(q) for w in name_words) for q in words):
+                    _add(i)
+
+        # 3. Errori di battitura
+        if len(found) < limit and len(query) >= 3:
+            from rapidfuzz import process, fuzz
+            for _, _, i in process.extract(query, names, scorer=fuzz.QRatio, processor=None,
+                                           limit=limit, score_cutoff=75):
+                if len(found) >= limit:
+                    break
+                _add(i)
+
+        return [items[i] for i in found[:limit]]
+
+
+class AutocompleteCache:
+    """
+    LRU dei risultati di /autocomplete per query normalizzata, condivisa dalle dialog.
+    Un risultato con meno elementi del limite è completo: le query più lunghe
+    che iniziano con la stessa stringa si risolvono filtrandolo, senza richieste.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # query -> (items, completo)
+
+    def get(self, query, limit=10):
+        query = normalize_query(query)
+        hit = self._entries.get(query)
+        if hit is not None:
+            self._entries.move_to_end(query)
+            return hit[0]
+        # Restringi il risultato completo del prefisso più lungo già in cache
+        for end in range(len(query) - 1, 0, -1):
+            hit = self._entries.get(query[:end])
+            if hit is None or not hit[1]:
+                continue
+            words = query.split()
+            items = [it for it in hit[0]
+                     if all(w in normalize_query(it.get('display_name', '')) for w in words)]
+            self.put(query, items, limit)
+            return items
+        return None
+
+    def put(self, query, items, limit=10):
+        query = normalize_query(query)
+        self._entries[query] = (items, len(items) < limit)
+        self._entries.move_to_end(query)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+AUTOCOMPLETE_CACHE = AutocompleteCache()
+
+_catalog = None
+
+def get_catalog():
+    """Restituisce il catalogo item condiviso dal processo"""
+    global _catalog
+    with _client_lock:
+        if _catalog is None:
+            _catalog = ItemCatalog()
+        return _catalog
+
+
+def watch_entry(raw):
+    """Voce di watchlist normalizzata, con gli stessi campi di SearchDialog.get_data(); None se non valida"""
+    if isinstance(raw, str):
+        raw = {'item': raw}
+    elif not isinstance(raw, dict):
+        return None  # es. numeri o liste in un JSON importato
+    item = str(raw.get('item') or raw.get('display_name') or "").strip()
+    if not item:
+        return None
+    rank = str(raw.get('rank_choice') or raw.get('rank') or "All").strip().capitalize()
+    return {
+        'item': item,
+        'max_price': str(raw.get('max_price') or "999999").strip(),
+        'rank_choice': rank if rank in ("All", "Maxed") else "All",
+        'max_rank_override': str(raw.get('max_rank_override') or "").strip(),
+    }
+
+
+class Watchlist:
+    """Elenco di item da sorvegliare, salvato nella cartella dati e importabile/esportabile"""
+    FIELDS = ('item', 'max_price', 'rank_choice', 'max_rank_override')
+
+    def __init__(self, path=None):
+        self.path = path or data_path("watchlist.json")
+        self.entries = []
+
+    def load(self):
+        try:
+            self.set_entries(self.read_file(self.path))
+        except (OSError, ValueError):
+            self.entries = []
+        return self.entries
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        self.write_file(tmp_path, self.entries)
+        os.replace(tmp_path, self.path)
+
+    def set_entries(self, entries):
+        # Una voce per item: vince l'ultima
+        by_url = OrderedDict()
+        for raw in entries:
+            entry = watch_entry(raw)
+            if entry:
+                by_url[to_item_url(entry['item'])] = entry
+        self.entries = list(by_url.values())
+
+    @classmethod
+    def read_file(cls, path):
+        """JSON ({"items": [...]} o lista) oppure CSV/testo: item[,max_price[,rank[,max_rank]]]"""
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            if path.lower().endswith(".json"):
+                data = json.load(f)
+                entries = data.get('items', []) if isinstance(data, dict) else data
+                if not isinstance(entries, list):
+                    raise ValueError("Expected a list of items")
+                return entries
+            return [dict(zip(cls.FIELDS, (c.strip() for c in row)))
+                    for row in csv.reader(f) if row and not row[0].lstrip().startswith("#")]
+
+    @classmethod
+    def write_file(cls, path, entries):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            if path.lower().endswith((".csv", ".txt")):
+                writer = csv.writer(f)
+                for entry in entries:
+                    writer.writerow([entry[k] for k in cls.FIELDS])
+            else:
+                json.dump({'items': entries}, f, indent=1)
+
+
+WATCH_BATCH_ENDPOINTS = {'start': "/start_watch_batch", 'stop': "/stop_watch_batch"}
+_unsupported_batches = set()  # azioni per cui il backend non ha l'endpoint batch
+
+def _post_watch_batch(client, action, entries):
+    """
+    Una richiesta batch; None se il backend non la supporta.
+    Errori di rete o risposte illeggibili valgono come fallimento di tutte le voci del blocco.
+    """
+    if action == 'start':
+        payload = {'items': entries}
+    else:
+        payload = {'items': [to_item_url(e['item']) for e in entries], 'clear_matches': True}
+    def _failed(message):
+        return [(to_item_url(e['item']), False, message) for e in entries]
+    try:
+        resp = client.post(WATCH_BATCH_ENDPOINTS[action], json=payload, timeout=HTTP_SLOW_READ_TIMEOUT)
+    except Exception as e:
+        return _failed(str(e))
+    if resp.status_code in (404, 405, 501):
+        return None
+    if resp.status_code != 200:
+        return _failed(f"Status {resp.status_code}")
+    try:
+        by_url = {r.get('item_url'): r for r in resp.json().get('results', [])}
+    except (ValueError, AttributeError, TypeError):
+        return _failed("Invalid response")
+    results = []
+    for e in entries:
+        item_url = to_item_url(e['item'])
+        r = by_url.get(item_url)
+        if r is None:
+            results.append((item_url, False, "Missing from response"))
+        else:
+            ok = bool(r.get('ok'))
+            results.append((item_url, ok, r.get('error') or ("OK" if ok else "Failed")))
+    return results
+
+def _post_watch(client, path, data):
+    """POST a un endpoint per singolo item; restituisce (ok, messaggio)"""
+    try:
+        resp = client.post(path, data=data)
+    except Exception as e:
+        return False, str(e)
+    if resp.status_code == 200:
+        return True, "OK"
+    return False, resp.text.strip()[:200] or f"Status {resp.status_code}"
+
+def _stop_watch(client, item_url):
+    """Stop e poi clear per un item: in quest'ordine, così un match trovato prima dello stop non sopravvive"""
+    ok, message = _post_watch(client, "/stop_watch", {'item_url': item_url})
+    if not ok:
+        return False, message
+    cleared, clear_message = _post_watch(client, "/clear_matches", {'item_url': item_url})
+    if not cleared:
+        return True, f"Offers not cleared: {clear_message}"
+    return True, message
+
+def run_watch_batch(client, action, entries):
+    """
+    Avvia ('start') o ferma ('stop') più watch: endpoint batch se il backend lo ha,
+    altrimenti richieste singole in parallelo (al massimo WATCH_CONCURRENCY).
+    Restituisce [(item_url, ok, messaggio)] nello stesso ordine delle voci.
+    """
+    results = []
+    pending = list(entries)
+    while pending and action not in _unsupported_batches:
+        chunk_results = _post_watch_batch(client, action, pending[:WATCH_BATCH_MAX])
+        if chunk_results is None:
+            _unsupported_batches.add(action)
+            break
+        results.extend(chunk_results)
+        pending = pending[WATCH_BATCH_MAX:]
+    if not pending:
+        return results
+    urls = [to_item_url(e['item']) for e in pending]
+    with ThreadPoolExecutor(max_workers=WATCH_CONCURRENCY, thread_name_prefix="wmsniper-watch") as pool:
+        if action == 'start':
+            outcomes = pool.map(lambda e: _post_watch(client, "/start_watch", e), pending)
+        else:
+            # in parallelo tra item diversi; per lo stesso item clear solo a stop concluso
+            outcomes = pool.map(lambda u: _stop_watch(client, u), urls)
+        for item_url, (ok, message) in zip(urls, outcomes):
+            results.append((item_url, ok, message))
+    return results
+
+
+# Stile unico dell'applicazione: analizzato una volta sola e applicato per objectName,
+# invece di un setStyleSheet per ogni widget creato
+APP_STYLESHEET = """
+QPushButton#newSearchButton {
+    background-color: #3498db;
+    color: white;
+    font-weight: bold;
+    padding: 5px;
+    border-radius: 3px;
+}
+QPushButton#newSearchButton:hover {
+    background-color: #2980b9;
+}
+QPushButton#watchlistButton {
+    background-color: #8e44ad;
+    color: white;
+    font-weight: bold;
+    padding: 5px;
+    border-radius: 3px;
+}
+QPushButton#watchlistButton:hover {
+    background-color: #71368a;
+}
+QPushButton#closeAppButton {
+    background-color: #e74c3c;
+    color: white;
+    font-weight: bold;
+    font-size: 12px;
+    border-radius: 3px;
+    min-width: 24px;
+    max-width: 24px;
+    min-height: 24px;
+    max-height: 24px;
+}
+QPushButton#closeAppButton:hover {
+    background-color: #c0392b;
+}
+QTabWidget#overlayTabs::pane {
+    border: 1px solid #444;
+    background: rgba(30, 30, 30, 200);
+}
+QTabWidget#overlayTabs > QTabBar::tab {
+    background: rgba(50, 50, 50, 200);
+    color: white;
+    padding: 8px;
+    border-top-left-radius: 4px;
+    border-top-right-radius: 4px;
+}
+QTabWidget#overlayTabs > QTabBar::tab:selected {
+    background: rgba(70, 70, 70, 200);
+    border-bottom: 2px solid #3498db;
+}
+QPushButton#stopButton {
+    background-color: #e67e22;
+    color: white;
+    padding: 3px 8px;
+    border-radius: 3px;
+}
+QPushButton#stopButton:hover {
+    background-color: #d35400;
+}
+QPushButton#stopButton:disabled {
+    background-color: #7f6a5a;
+}
+QPushButton#groupHeader {
+    color: white;
+    font-weight: bold;
+    text-align: left;
+    background: transparent;
+    border: none;
+    padding: 4px;
+}
+QPushButton#groupClose {
+    color: #aaaaaa;
+    background: transparent;
+    border: none;
+    min-width: 20px;
+    max-width: 20px;
+}
+QPushButton#groupClose:hover {
+    color: #e74c3c;
+}
+QLabel#groupStatus {
+    color: #aaaaaa;
+    font-size: 11px;
+}
+QScrollArea#manualGroups, QWidget#manualGroupsContent {
+    background: transparent;
+    border: none;
+}
+QListView#offerList {
+    background-color: rgba(30,30,30,150);
+    border-radius: 5px;
+    border: none;
+}
+QLabel#infoLabel {
+    color: white;
+    font-size: 10pt;
+    padding: 5px;
+}
+QLabel#pendingLabel {
+    color: #aaaaaa;
+    font-size: 11px;
+    padding: 2px 6px;
+}
+QListWidget#autocompleteList {
+    background-color: #222;
+    color: white;
+    border: 1px solid #444;
+    border-radius: 4px;
+    font-size: 12px;
+}
+QListWidget#autocompleteList::item {
+    padding: 4px;
+    border-bottom: 1px solid #333;
+}
+QListWidget#autocompleteList::item:selected {
+    background-color: #2a82da;
+}
+"""
+
 class ToggleIcon(QLabel):
-    def __init__(self, overlay_window, parent=None):
+    def __init__(self, on_toggle, parent=None):
         super().__init__(parent)
-        self.overlay = overlay_window
+        self.on_toggle = on_toggle  # l'overlay può non esistere ancora
         self.setFixedSize(32, 32)
         self.setWindowFlags(
             Qt.WindowStaysOnTopHint |
@@ -113,253 +1610,722 @@ class ToggleIcon(QLabel):
         
     def mouseDoubleClickEvent(self, event):
         if event.button() == Qt.LeftButton:
-            self.overlay.toggle_overlay()
+            self.on_toggle()
             event.accept()
 
-class OfferWidget(QFrame):
-    def __init__(self, offer, overlay_instance):
-        super().__init__()
-        self.offer = offer
-        self.overlay = overlay_instance
-        self.setStyleSheet("""
-            QFrame { 
-                background-color: rgba(0,0,0,150); 
-                border-radius: 5px; 
-                margin: 2px;
-            }
-            QLabel { 
-                color: white; 
-                font-size: 9pt;
-            }
-            QPushButton { 
-                color: white; 
-                border: none; 
-                border-radius: 3px; 
-                padding: 2px 4px;
-                font-size: 9pt;
-            }
-            #copyButton {
-                background-color: #4CAF50; 
-                min-width: 50px;
-            }
-            #copyButton:hover {
-                background-color: #45a049; 
-            }
-            #favButton {
-                background-color: #e74c3c;
-                min-width: 30px;
-            }
-            #favButton:hover {
-                background-color: #c0392b;
-            }
-            #removeButton {
-                background-color: #95a5a6;
-                min-width: 60px;
-            }
-            #removeButton:hover {
-                background-color: #7f8c8d;
-            }
-            #stopButton {
-                background-color: #e67e22;
-                min-width: 50px;
-            }
-            #stopButton:hover {
-                background-color: #d35400;
-            }
-        """)
-        
-        layout = QHBoxLayout()
-        
-        # Etichetta principale con testo ridotto
-        main_text = f"{offer.get('display_name')} - {offer.get('price')}p"
-        self.label = QLabel(main_text)
-        self.label.setToolTip(f"Venditore: {offer.get('seller')}")
-        layout.addWidget(self.label, 1)
-        
-        # Contenitore per i pulsanti
-        btn_container = QWidget()
-        btn_layout = QHBoxLayout()
-        btn_layout.setContentsMargins(0, 0, 0, 0)
-        btn_layout.setSpacing(4)
-        
-        # Pulsanti con dimensioni ottimizzate
-        copy_btn = QPushButton("Copy")
-        copy_btn.setObjectName("copyButton")
-        copy_btn.setToolTip("Copia messaggio per il venditore")
-        copy_btn.clicked.connect(self.copy_message)
-        btn_layout.addWidget(copy_btn)
-
-        remove_btn = QPushButton("Remove")
-        remove_btn.setObjectName("removeButton")
-        remove_btn.setToolTip("Rimuovi questa offerta")
-        remove_btn.clicked.connect(self.remove_self)
-        btn_layout.addWidget(remove_btn)
-        
-        stop_btn = QPushButton("Stop")
-        stop_btn.setObjectName("stopButton")
-        stop_btn.setToolTip("Ferma ricerca per questo item")
-        stop_btn.clicked.connect(self.stop_search)
-        btn_layout.addWidget(stop_btn)
-        
-        btn_container.setLayout(btn_layout)
-        layout.addWidget(btn_container, 0)
-        
-        self.setLayout(layout)
+def offer_message(offer):
+    seller = offer.seller or ""
+    return f"/w {seller} Hi! I want to buy: \"{offer.display_name}\" for {offer.price} platinum. (warframe.market)"
+
+def copy_to_clipboard(text):
+    import pyperclip  # import al primo uso, non all'avvio
+    pyperclip.copy(text)
+
+
+class MatchStateStore:
+    """
+    Chiavi notificate e soppresse su SQLite, per riprendere al riavvio.
+    Il thread UI accumula le modifiche, flush() e compact() le scrivono da un worker.
+    Le colonne della chiave primaria non ammettono NULL: un'offerta senza prezzo
+    (o senza venditore) si salva con NO_PRICE (o "") e torna None al caricamento.
+    """
+    NO_PRICE = -1
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS match_state (
+            item TEXT NOT NULL,
+            seller TEXT NOT NULL,
+            price INTEGER NOT NULL,
+            seen REAL NOT NULL,
+            suppressed INTEGER NOT NULL,
+            PRIMARY KEY (item, seller, price)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS match_state_seen ON match_state (seen);
+    """
+
+    def __init__(self, path=None, ttl=MATCH_STATE_TTL, max_keys=MATCH_STATE_MAX_KEYS):
+        self.path = path or data_path("match_state.sqlite3")
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.pending = {}            # key -> (seen, soppressa), da scrivere
+        self.pending_items = set()   # item le cui chiavi tornano tutte non soppresse
+        self._pending_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            # prima di creare le tabelle: lo spazio liberato si recupera con incremental_vacuum
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def load(self):
+        """Voci non scadute [(key, seen, soppressa)], dalla meno recente, al massimo max_keys"""
+        with self._db_lock:
+            try:
+                rows = self._connection().execute(
+                    "SELECT item, seller, price, seen, suppressed FROM match_state"
+                    " WHERE seen >= ? ORDER BY seen DESC LIMIT ?",
+                    (time.time() - self.ttl, self.max_keys)).fetchall()
+            except sqlite3.Error as e:
+                print("Match state load error:", e)
+                return []
+        rows.reverse()
+        return [(OfferKey(item or None, seller or None, None if price == self.NO_PRICE else price),
+                 seen, bool(suppressed))
+                for item, seller, price, seen, suppressed in rows]
+
+    def record(self, key, seen, suppressed):
+        with self._pending_lock:
+            self.pending[key] = (seen, suppressed)
+
+    def unsuppress_item(self, item):
+        with self._pending_lock:
+            # le modifiche già in coda per l'item valgono come non soppresse
+            for key, (seen, suppressed) in self.pending.items():
+                if suppressed and key.item == item:
+                    self.pending[key] = (seen, False)
+            self.pending_items.add(item)
+
+    def flush(self):
+        """Scrive le modifiche accumulate; restituisce quante voci ha scritto"""
+        with self._pending_lock:
+            pending, self.pending = self.pending, {}
+            items, self.pending_items = self.pending_items, set()
+        if not pending and not items:
+            return 0
+        with self._db_lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("UPDATE match_state SET suppressed = 0 WHERE item = ?",
+                                 [(item,) for item in items])
+                conn.executemany(
+                    "INSERT OR REPLACE INTO match_state (item, seller, price, seen, suppressed)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(key.item or "", key.seller or "", self.NO_PRICE if key.price is None else key.price,
+                      seen, int(suppressed))
+                     for key, (seen, suppressed) in pending.items()])
+        return len(pending)
 
-    def copy_message(self):
-        seller = self.offer.get('seller') or ""
-        msg = f"/w {seller} Hi! I want to buy: \"{self.offer.get('display_name')}\" for {self.offer.get('price')} platinum. (warframe.market)"
-        pyperclip.copy(msg)
+    def compact(self):
+        """Elimina le voci scadute e quelle oltre max_keys, poi restituisce lo spazio libero"""
+        self.flush()
+        with self._db_lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM match_state WHERE seen < ?", (time.time() - self.ttl,))
+                conn.execute(
+                    "DELETE FROM match_state WHERE (item, seller, price) IN ("
+                    " SELECT item, seller, price FROM match_state ORDER BY seen DESC LIMIT -1 OFFSET ?)",
+                    (self.max_keys,))
+            conn.execute("PRAGMA incremental_vacuum")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
-    def remove_self(self):
-        # Sopprimi temporaneamente questa notifica (riapparirà al prossimo start_watch)
+    def close(self):
         try:
-            msg_id = f"{self.offer.get('item')}_{self.offer.get('seller')}_{self.offer.get('price')}"
-            self.overlay.suppressed_items.add(msg_id)
-            if msg_id in self.overlay.notified_items:
-                self.overlay.notified_items.remove(msg_id)
-            # Rimuovi anche il widget dalla mappa offers_by_item se presente
-            item_url = self.offer.get('item')
-            if item_url and item_url in self.overlay.offers_by_item:
+            self.flush()
+        except sqlite3.Error as e:
+            print("Match state save error:", e)
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class MatchIndex:
+    """
+    Stato dei match del tab Sniper indicizzato per OfferKey:
+    offerte mostrate, chiavi per item e chiavi già notificate o soppresse.
+    Le chiavi notificate/soppresse scadono dopo ttl secondi dall'ultima volta viste
+    e oltre max_keys escono le meno recenti; con uno store vengono salvate su disco.
+    Tutte le operazioni sono a tempo costante per chiave.
+    """
+
+    def __init__(self, store=None, ttl=MATCH_STATE_TTL, max_keys=MATCH_STATE_MAX_KEYS):
+        self.offers = {}      # key -> offerta mostrata
+        self.by_item = {}     # item -> {key: None} (ordine di arrivo)
+        self.state = OrderedDict()  # key -> (ultima volta vista, soppressa), dalla meno recente
+        self.suppressed = {}  # item -> set di key soppresse
+        self.store = store
+        self.ttl = ttl
+        self.max_keys = max_keys
+
+    def __len__(self):
+        return len(self.offers)
+
+    def __contains__(self, key):
+        return key in self.offers
+
+    def restore(self, entries):
+        """Riprende lo stato salvato: [(key, seen, soppressa)], dalla meno recente"""
+        for key, seen, suppressed in entries:
+            self.state[key] = (seen, suppressed)
+            if suppressed:
+                self.suppressed.setdefault(key.item, set()).add(key)
+        self._evict()
+
+    def is_suppressed(self, key):
+        keys = self.suppressed.get(key.item)
+        return keys is not None and key in keys
+
+    def was_notified(self, key):
+        """True se la chiave è già stata mostrata (anche in una sessione precedente)"""
+        return key in self.state
+
+    def _touch(self, key, suppressed):
+        seen = time.time()
+        self.state[key] = (seen, suppressed)
+        self.state.move_to_end(key)
+        if self.store is not None:
+            self.store.record(key, seen, suppressed)
+        self._evict()
+
+    def _evict(self):
+        while len(self.state) > self.max_keys:
+            key, (seen, suppressed) = self.state.popitem(last=False)
+            if suppressed:
+                self._drop_suppressed(key)
+
+    def _drop_suppressed(self, key):
+        keys = self.suppressed.get(key.item)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.suppressed[key.item]
+
+    def expire(self, now=None):
+        """Dimentica le chiavi non viste da più di ttl secondi; restituisce quante"""
+        limit = (now or time.time()) - self.ttl
+        expired = 0
+        while self.state:
+            key, (seen, suppressed) = next(iter(self.state.items()))
+            if seen >= limit:
+                break
+            del self.state[key]
+            if suppressed:
+                self._drop_suppressed(key)
+            expired += 1
+        return expired
+
+    def add(self, key, offer):
+        self.offers[key] = offer
+        self.by_item.setdefault(key.item, {})[key] = None
+        self._touch(key, False)
+
+    def discard(self, key):
+        """Rimuove la chiave dalle offerte mostrate; restituisce l'offerta o None"""
+        offer = self.offers.pop(key, None)
+        if offer is not None:
+            keys = self.by_item[key.item]
+            del keys[key]
+            if not keys:
+                del self.by_item[key.item]
+        return offer
+
+    def suppress(self, key):
+        self.suppressed.setdefault(key.item, set()).add(key)
+        self._touch(key, True)
+
+    def unsuppress(self, key):
+        if self.is_suppressed(key):
+            self._drop_suppressed(key)
+            self._touch(key, False)
+
+    def unsuppress_item(self, item):
+        keys = self.suppressed.pop(item, None)
+        if keys is None:
+            return
+        for key in keys:
+            entry = self.state.get(key)
+            if entry is not None:
+                self.state[key] = (entry[0], False)
+        if self.store is not None:
+            self.store.unsuppress_item(item)
+
+    def item_keys(self, item):
+        return list(self.by_item.get(item, ()))
+
+
+def diff_offer_rows(old_keys, new_keys):
+    """
+    Operazioni minime per trasformare la sequenza old_keys in new_keys:
+    ('remove', prima, ultima), ('move', da, a) e ('insert', riga, key),
+    da applicare in ordine (ogni indice si riferisce allo stato corrente).
+    """
+    ops = []
+    new_set = set(new_keys)
+    current = list(old_keys)
+    # Rimozioni in blocchi contigui, dal fondo
+    row = len(current) - 1
+    while row >= 0:
+        if current[row] in new_set:
+            row -= 1
+            continue
+        last = row
+        while row >= 0 and current[row] not in new_set:
+            row -= 1
+        ops.append(('remove', row + 1, last))
+        del current[row + 1:last + 1]
+    # Spostamenti e inserimenti seguendo il nuovo ordine
+    for i, key in enumerate(new_keys):
+        if i < len(current) and current[i] == key:
+            continue
+        try:
+            j = current.index(key, i + 1)
+        except ValueError:
+            ops.append(('insert', i, key))
+            current.insert(i, key)
+        else:
+            ops.append(('move', j, i))
+            current.insert(i, current.pop(j))
+    return ops
+
+
+class OfferPatch:
+    """Operazioni di diff_offer_rows calcolate nel worker, più i dati per applicarle"""
+    __slots__ = ('ops', 'by_key', 'base', 'keys', 'total')
+
+    def __init__(self, ops, by_key, base, keys, total):
+        self.ops = ops
+        self.by_key = by_key
+        self.base = base    # chiavi mostrate su cui sono calcolate le operazioni
+        self.keys = keys    # chiavi mostrate dopo la patch
+        self.total = total  # offerte ricevute in totale
+
+
+class OfferListDiffer:
+    """
+    Snapshot lato worker delle righe mostrate in una lista di offerte:
+    ordina la risposta per prezzo, tiene le prime limit e calcola la patch.
+    """
+
+    def __init__(self, limit=10):
+        self.limit = limit
+        self.keys = ()
+        self._lock = threading.Lock()
+
+    def patch(self, offers, total=None):
+        # Ordina le offerte per prezzo (crescente)
+        ordered = sorted(offers, key=offer_price_key)
+        by_key = {}
+        for offer in ordered:
+            if len(by_key) >= self.limit:
+                break
+            by_key.setdefault(offer.key, offer)
+        keys = tuple(by_key)
+        with self._lock:
+            base = self.keys
+            self.keys = keys
+        return OfferPatch(diff_offer_rows(base, keys), by_key, base, keys,
+                          len(offers) if total is None else total)
+
+    def reset(self, keys=()):
+        """Riallinea lo snapshot a ciò che la UI mostra davvero"""
+        with self._lock:
+            self.keys = tuple(keys)
+
+
+def format_age(seconds):
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+class OfferCache:
+    """
+    Ultime offerte viste per ogni ricerca manuale (item_url, rank, max_rank_override), su disco:
+    alla ricerca successiva si mostrano subito, mentre il refresh le sostituisce.
+    Le voci scadono dopo ttl secondi e oltre max_entries escono le meno usate.
+    Su disco: [chiave, timestamp, totale, nome, [[venditore, prezzo], ...]] per voce.
+    """
+    VERSION = 1
+
+    def __init__(self, path=None, ttl=OFFER_CACHE_TTL, max_entries=OFFER_CACHE_MAX_ENTRIES):
+        self.path = path or data_path("offer_cache.json")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # chiave -> (ts, totale, nome, righe), dalla meno usata
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(params):
+        return "|".join((params['item_url'], params['rank'], params.get('max_rank_override', "")))
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get('v') != self.VERSION or not isinstance(data.get('entries'), list):
+            return
+        now = time.time()
+        with self._lock:
+            for entry in data['entries']:
+                # file troncato o modificato a mano: le voci malformate si scartano
                 try:
-                    self.overlay.offers_by_item[item_url].remove(self)
-                except ValueError:
-                    pass
-                if not self.overlay.offers_by_item[item_url]:
-                    del self.overlay.offers_by_item[item_url]
-        except Exception:
-            pass
+                    key, ts, total, name, rows = entry
+                    if not isinstance(key, str) or now - ts >= self.ttl:
+                        continue
+                    rows = [[seller, price] for seller, price in rows]
+                except (TypeError, ValueError):
+                    continue
+                self.entries[key] = (ts, total, name, rows)
+            self._evict()
 
-        self.setParent(None)
-        self.deleteLater()
-            
-    def stop_search(self):
-        item_url = self.offer.get('item')
-        headers = {'X-User-ID': self.overlay.user_id} if self.overlay.user_id else {}
-        self._stop_worker = HttpWorker(self)
-        def _task():
-            # 1. Ferma la ricerca
-            response = requests.post(
-                f"{BACKEND_URL}/stop_watch",
-                data={'item_url': item_url},
-                headers=headers,
-                timeout=5
-            )
-            if response.status_code != 200:
-                raise Exception(f"Search Stop Error: {response.text}")
-            # 2. Rimuovi le offerte dal backend
-            clear_response = requests.post(
-                f"{BACKEND_URL}/clear_matches",
-                data={'item_url': item_url},
-                headers=headers,
-                timeout=5
-            )
-            return (response.status_code, clear_response.status_code, clear_response.text, item_url)
-        def _on_success(result):
-            stop_code, clear_code, clear_text, it = result
-            if stop_code == 200:
-                print(f"Ricerca fermata per: {it}")
-                if clear_code == 200:
-                    print(f"Offerte rimosse per: {it}")
-                else:
-                    print("Offer Removal Error:", clear_text)
-                self.overlay.remove_item_widgets(it)
-        def _on_error(e):
-            print("Stop search request error:", e)
-        self._stop_worker.success.connect(_on_success)
-        self._stop_worker.error.connect(_on_error)
-        self._stop_worker.run(_task)
+    def get(self, key):
+        """(offerte, totale, timestamp) se la voce c'è e non è scaduta, altrimenti None"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            ts, total, name, rows = entry
+            if time.time() - ts > self.ttl:
+                del self.entries[key]
+                self.dirty = True
+                return None
+            self.entries.move_to_end(key)
+        item_url = key.split("|", 1)[0]
+        return [Offer(item_url, seller, price, name) for seller, price in rows], total, ts
 
-class ManualOfferWidget(QFrame):
-    def __init__(self, offer, parent=None):
-        super().__init__(parent)
-        self.offer = offer
-        self.parent_tab = parent
-        
-        self.setStyleSheet("""
-            QFrame { 
-                background-color: rgba(0,0,0,150); 
-                border-radius: 5px; 
-                margin: 2px;
-            }
-            QLabel { 
-                color: white; 
-                font-size: 9pt;
-            }
-            QPushButton { 
-                color: white; 
-                border: none; 
-                border-radius: 3px; 
-                padding: 2px 4px;
-                font-size: 9pt;
-            }
-            #copyButton {
-                background-color: #4CAF50; 
-                min-width: 50px;
-            }
-            #copyButton:hover {
-                background-color: #45a049; 
-            }
-            #removeButton {
-                background-color: #95a5a6;
-                min-width: 60px;
-            }
-            #removeButton:hover {
-                background-color: #7f8c8d;
-            }
-        """)
-        
-        layout = QHBoxLayout()
-        
-        # Etichetta principale
-        main_text = f"{offer.get('display_name')} - {offer.get('price')}p"
-        self.label = QLabel(main_text)
-        self.label.setToolTip(f"Venditore: {offer.get('seller')}")
-        layout.addWidget(self.label, 1)
-        
-        # Contenitore per i pulsanti
-        btn_container = QWidget()
-        btn_layout = QHBoxLayout()
-        btn_layout.setContentsMargins(0, 0, 0, 0)
-        btn_layout.setSpacing(4)
-        
-        # Pulsanti
-        copy_btn = QPushButton("Copy")
-        copy_btn.setObjectName("copyButton")
-        copy_btn.setToolTip("Copia messaggio per il venditore")
-        copy_btn.clicked.connect(self.copy_message)
-        btn_layout.addWidget(copy_btn)
-
-        remove_btn = QPushButton("Remove")
-        remove_btn.setObjectName("removeButton")
-        remove_btn.setToolTip("Rimuovi questa offerta")
-        remove_btn.clicked.connect(self.remove_self)
-        btn_layout.addWidget(remove_btn)
-        
-        btn_container.setLayout(btn_layout)
-        layout.addWidget(btn_container, 0)
-        
-        self.setLayout(layout)
+    def put(self, key, offers, total):
+        offers = list(offers)
+        name = offers[0].display_name if offers else ""
+        with self._lock:
+            self.entries[key] = (time.time(), total, name, [[o.seller, o.price] for o in offers])
+            self.entries.move_to_end(key)
+            self._evict()
+            self.dirty = True
+
+    def _evict(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
 
-    def copy_message(self):
-        seller = self.offer.get('seller') or ""
-        msg = f"/w {seller} Hi! I want to buy: \"{self.offer.get('display_name')}\" for {self.offer.get('price')} platinum. (warframe.market)"
-        pyperclip.copy(msg)
+    def save(self):
+        """Scrive su disco se ci sono modifiche; chiamabile da un worker"""
+        with self._lock:
+            if not self.dirty:
+                return False
+            entries = [[key, round(ts, 1), total, name, rows]
+                       for key, (ts, total, name, rows) in self.entries.items()]
+            self.dirty = False
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({'v': self.VERSION, 'entries': entries}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        return True
 
-    def remove_self(self):
-        self.setParent(None)
-        self.deleteLater()
 
-class ManualSearchDialog(QDialog):
+class OfferListModel(QAbstractListModel):
+    """Lista di offerte per le tab Sniper e Warframe Market (una riga per offerta)"""
+    OfferRole = Qt.UserRole
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setWindowTitle("WM Search")
-        self.setWindowFlags(self.windowFlags() & ~Qt.WindowContextHelpButtonHint)
-        self.setFixedSize(550, 400)
-        layout = QVBoxLayout()
-        
-        form = QFormLayout()
-        
+        self._offers = []
+        self._row_of = {}  # key -> riga; None = da ricostruire dopo rimozioni/spostamenti
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._offers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        offer = self._offers[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{offer.display_name} - {offer.price}p"
+        if role == Qt.ToolTipRole:
+            return f"Venditore: {offer.seller}"
+        if role == self.OfferRole:
+            return offer
+        return None
+
+    def offer_at(self, row):
+        return self._offers[row]
+
+    def offers(self):
+        return list(self._offers)
+
+    def row_of(self, key):
+        if self._row_of is None:
+            self._row_of = {o.key: row for row, o in enumerate(self._offers)}
+        return self._row_of.get(key)
+
+    def append(self, offer):
+        row = len(self._offers)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._offers.append(offer)
+        if self._row_of is not None:
+            self._row_of[offer.key] = row
+        self.endInsertRows()
+
+    def extend(self, offers):
+        """Aggiunge più righe in coda con un solo beginInsertRows"""
+        if not offers:
+            return
+        row = len(self._offers)
+        self.beginInsertRows(QModelIndex(), row, row + len(offers) - 1)
+        self._offers.extend(offers)
+        if self._row_of is not None:
+            for i, offer in enumerate(offers, row):
+                self._row_of[offer.key] = i
+        self.endInsertRows()
+
+    def remove_keys(self, keys):
+        """Rimuove le righe delle chiavi indicate in una sola passata, a blocchi contigui"""
+        rows = sorted({r for r in map(self.row_of, keys) if r is not None}, reverse=True)
+        i = 0
+        while i < len(rows):
+            last = first = rows[i]
+            i += 1
+            while i < len(rows) and rows[i] == first - 1:
+                first = rows[i]
+                i += 1
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._offers[first:last + 1]
+            self._row_of = None
+            self.endRemoveRows()
+
+    def reconcile(self, offers):
+        """Porta la lista a offers inserendo, rimuovendo o spostando solo le righe cambiate"""
+        by_key = {}
+        for offer in offers:
+            by_key.setdefault(offer.key, offer)
+        ops = diff_offer_rows([o.key for o in self._offers], list(by_key))
+        self.apply_patch(ops, by_key)
+
+    def keys(self):
+        return tuple(o.key for o in self._offers)
+
+    def apply_offer_patch(self, patch):
+        """Applica una OfferPatch; se la lista è cambiata nel frattempo riconcilia per chiave"""
+        if self.keys() == patch.base:
+            self.apply_patch(patch.ops, patch.by_key)
+        else:
+            self.reconcile([patch.by_key[k] for k in patch.keys])
+
+    def apply_patch(self, ops, by_key):
+        root = QModelIndex()
+        if ops:
+            self._row_of = None
+        for op in ops:
+            if op[0] == 'remove':
+                _, first, last = op
+                self.beginRemoveRows(root, first, last)
+                del self._offers[first:last + 1]
+                self.endRemoveRows()
+            elif op[0] == 'move':
+                _, src, dst = op
+                # Qt vuole la posizione di destinazione prima dello spostamento
+                self.beginMoveRows(root, src, src, root, dst if dst < src else dst + 1)
+                self._offers.insert(dst, self._offers.pop(src))
+                self.endMoveRows()
+            else:
+                _, row, key = op
+                self.beginInsertRows(root, row, row)
+                self._offers.insert(row, by_key[key])
+                self.endInsertRows()
+        # Righe invariate: tieni l'oggetto più recente (stesso testo, nessun repaint)
+        for row, o in enumerate(self._offers):
+            newer = by_key.get(o.key)
+            if newer is not None:
+                self._offers[row] = newer
+
+    def remove_offer(self, offer):
+        for row, o in enumerate(self._offers):
+            if o is offer:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._offers[row]
+                self._row_of = None
+                self.endRemoveRows()
+                return True
+        return False
+
+
+class OfferDelegate(QStyledItemDelegate):
+    """
+    Disegna ogni offerta (testo + pulsanti) senza creare widget per riga.
+    I click sui pulsanti sono riconosciuti per posizione ed emessi come (azione, offerta).
+    Con degli storici prezzi aggiunge sparkline delle ultime 24h e badge "-x%" rispetto alla mediana
+    (vale il primo storico che ha abbastanza campioni per l'item).
+    """
+    buttonClicked = pyqtSignal(str, object)
+
+    # azione: (testo, colore, colore hover, larghezza minima, tooltip)
+    BUTTONS = {
+        'copy': ("Copy", "#4CAF50", "#45a049", 50, "Copia messaggio per il venditore"),
+        'remove': ("Remove", "#95a5a6", "#7f8c8d", 60, "Rimuovi questa offerta"),
+        'stop': ("Stop", "#e67e22", "#d35400", 50, "Ferma ricerca per questo item"),
+    }
+    ROW_HEIGHT = 36
+    SPARK_WIDTH = 44
+
+    def __init__(self, actions, parent=None, histories=()):
+        super().__init__(parent)
+        self.actions = actions
+        self.histories = histories
+        self.font = QFont()
+        self.font.setPointSize(9)
+        self.metrics = QFontMetrics(self.font)
+        self.widths = {a: max(self.BUTTONS[a][3], self.metrics.horizontalAdvance(self.BUTTONS[a][0]) + 8)
+                       for a in actions}
+        self.background = QColor(0, 0, 0, 150)
+        self.selected_background = QColor(52, 152, 219, 110)
+        # colori dei pulsanti creati una volta, non a ogni paint
+        self.colors = {a: (QColor(self.BUTTONS[a][1]), QColor(self.BUTTONS[a][2])) for a in actions}
+        self.spark_pen = QPen(QColor(255, 255, 255, 170), 1)
+        self.badge_color = QColor("#27ae60")
+        self.badge_width = self.metrics.horizontalAdvance("-100%") + 8
+        self.hover_point = None
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def button_rects(self, rect):
+        rects = []
+        x = rect.right() - 8
+        for action in reversed(self.actions):
+            w = self.widths[action]
+            rects.append((action, QRect(x - w + 1, rect.top() + 8, w, rect.height() - 16)))
+            x -= w + 4
+        rects.reverse()
+        return rects
+
+    def hit(self, rect, pos):
+        for action, brect in self.button_rects(rect):
+            if brect.contains(pos):
+                return action
+        return None
+
+    def price_summary(self, item):
+        for history in self.histories:
+            summary = history.summary(item)
+            if summary is not None:
+                return summary
+        return None
+
+    def history_rects(self, rect, right, offer):
+        """(summary, sparkline, badge, percentuale) a sinistra di right; rettangoli None se non c'è storico"""
+        summary = self.price_summary(offer.item) if self.histories else None
+        if summary is None:
+            return None, None, None, 0
+        pct = int((1 - offer.price / summary.median) * 100) if summary.median and offer.price else 0
+        badge = None
+        if pct >= HISTORY_BADGE_MIN_PCT:
+            badge = QRect(right - self.badge_width + 1, rect.top() + 10, self.badge_width, rect.height() - 20)
+            right = badge.left() - 4
+        spark = QRect(right - self.SPARK_WIDTH + 1, rect.top() + 9, self.SPARK_WIDTH, rect.height() - 18)
+        return summary, spark, badge, pct
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setFont(self.font)
+        rect = option.rect.adjusted(2, 2, -2, -2)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.selected_background if option.state & QStyle.State_Selected else self.background)
+        painter.drawRoundedRect(rect, 5, 5)
+
+        buttons = self.button_rects(option.rect)
+        text_right = buttons[0][1].left() - 6 if buttons else rect.right() - 6
+        summary, spark, badge, pct = self.history_rects(rect, text_right, index.model().offer_at(index.row()))
+        if summary is not None:
+            text_right = spark.left() - 6
+            self._paint_history(painter, summary, spark, badge, pct)
+        text_rect = QRect(rect.left() + 8, rect.top(), text_right - rect.left() - 8, rect.height())
+        text = self.metrics.elidedText(index.data(Qt.DisplayRole) or "", Qt.ElideRight, text_rect.width())
+        painter.setPen(Qt.white)
+        painter.drawText(text_rect, Qt.AlignVCenter | Qt.AlignLeft, text)
+
+        hovered = self.hover_point if option.state & QStyle.State_MouseOver else None
+        for action, brect in buttons:
+            color, hover_color = self.colors[action]
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(hover_color if hovered is not None and brect.contains(hovered) else color)
+            painter.drawRoundedRect(brect, 3, 3)
+            painter.setPen(Qt.white)
+            painter.drawText(brect, Qt.AlignCenter, self.BUTTONS[action][0])
+        painter.restore()
+
+    def _paint_history(self, painter, summary, spark, badge, pct):
+        points = summary.spark
+        if len(points) > 1:
+            step = (spark.width() - 1) / (len(points) - 1)
+            bottom = spark.bottom()
+            height = spark.height() - 1
+            painter.setPen(self.spark_pen)
+            painter.setBrush(Qt.NoBrush)
+            painter.drawPolyline(QPolygonF([QPointF(spark.left() + i * step, bottom - v * height)
+                                            for i, v in enumerate(points)]))
+        if badge is not None:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self.badge_color)
+            painter.drawRoundedRect(badge, 3, 3)
+            painter.setPen(Qt.white)
+            painter.drawText(badge, Qt.AlignCenter, f"-{pct}%")
+
+    def editorEvent(self, event, model, option, index):
+        etype = event.type()
+        if etype == QEvent.MouseMove:
+            self.hover_point = event.pos()
+            if self.parent() is not None:
+                self.parent().viewport().update(option.rect)
+            return False
+        if etype in (QEvent.MouseButtonPress, QEvent.MouseButtonDblClick) and event.button() == Qt.LeftButton:
+            return self.hit(option.rect, event.pos()) is not None
+        if etype == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            action = self.hit(option.rect, event.pos())
+            if action:
+                # offer_at e non data(): il QVariant restituirebbe una copia del dict
+                self.buttonClicked.emit(action, index.model().offer_at(index.row()))
+                return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.ToolTip:
+            action = self.hit(option.rect, event.pos())
+            if action:
+                QToolTip.showText(event.globalPos(), self.BUTTONS[action][4], view)
+                return True
+            rect = option.rect.adjusted(2, 2, -2, -2)
+            buttons = self.button_rects(option.rect)
+            right = buttons[0][1].left() - 6 if buttons else rect.right() - 6
+            offer = index.model().offer_at(index.row())
+            summary, spark, badge, pct = self.history_rects(rect, right, offer)
+            if summary is not None and (spark.contains(event.pos()) or (badge is not None and badge.contains(event.pos()))):
+                text = f"24h median: {summary.median} platinum ({summary.samples} samples)"
+                if badge is not None:
+                    text = f"{pct}% below 24h median\n" + text
+                QToolTip.showText(event.globalPos(), text, view)
+                return True
+        return super().helpEvent(event, view, option, index)
+
+
+def make_offer_view(model, actions, on_action, histories=()):
+    """QListView virtualizzata: vengono disegnate solo le righe visibili"""
+    view = QListView()
+    view.setModel(model)
+    view.setUniformItemSizes(True)
+    view.setMouseTracking(True)
+    view.setSelectionMode(QAbstractItemView.NoSelection)
+    view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+    view.setObjectName("offerList")
+    delegate = OfferDelegate(actions, view, histories)
+    # Queued: l'azione può rimuovere la riga, meglio farlo fuori da editorEvent
+    delegate.buttonClicked.connect(on_action, Qt.QueuedConnection)
+    view.setItemDelegate(delegate)
+    return view
+
+class AutocompleteMixin:
+    """Campo item con suggerimenti, condiviso da SearchDialog e ManualSearchDialog"""
+
+    def _init_autocomplete(self, form):
         # Campo per il nome dell'item con autocomplete
         self.item_input = QLineEdit()
         self.item_input.setPlaceholderText("Ex: Ash Prime Set")
@@ -371,57 +2337,37 @@ class ManualSearchDialog(QDialog):
         self.autocomplete_list = QListWidget()
         self.autocomplete_list.setVisible(False)
         self.autocomplete_list.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.autocomplete_list.setStyleSheet("""
-            QListWidget { 
-                background-color: #222; 
-                color: white; 
-                border: 1px solid #444;
-                border-radius: 4px;
-                font-size: 12px;
-            }
-            QListWidget::item {
-                padding: 0px;
-                border-bottom: 1px solid #333;
-            }
-            QListWidget::item:selected {
-                background-color: #2a82da;
-            }
-        """)
+        self.autocomplete_list.setObjectName("autocompleteList")
         self.autocomplete_list.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.autocomplete_list.itemClicked.connect(self.select_autocomplete_item)
         self.autocomplete_list.itemDoubleClicked.connect(self.accept_autocomplete_item)
-        
-        # Selezione per il rank
-        self.rank_combo = QComboBox()
-        self.rank_combo.addItems(["All", "Maxed"])
-        form.addRow("Rank:", self.rank_combo)
-        
-        # Campo per l'override del max rank
-        self.max_rank_input = QLineEdit()
-        self.max_rank_input.setPlaceholderText("3/5/10")
-        form.addRow("Max Rank Override:", self.max_rank_input)
-        
-        layout.addLayout(form)
-        layout.addWidget(self.autocomplete_list)
-        
-        # Pulsanti OK/Cancel
-        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(self.accept)
-        buttons.rejected.connect(self.reject)
-        layout.addWidget(buttons)
-        
-        self.setLayout(layout)
+
+        self.catalog = get_catalog()
+        self.autocomplete_cache = AUTOCOMPLETE_CACHE
+        self._autocomplete_seq = 0  # le risposte con numero più vecchio vengono scartate
         self.timer = QTimer()
         self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.fetch_autocomplete)
         
     def on_text_changed(self, text):
         self.timer.stop()
-        if text.strip():
-            self.timer.start(300)  # Ritardo di 300ms per evitare troppe richieste
-        else:
+        # Ogni testo nuovo (anche vuoto) rende obsolete le risposte ancora in arrivo
+        self._autocomplete_seq += 1
+        if not text.strip():
             self.autocomplete_list.clear()
             self.autocomplete_list.setVisible(False)
+            return
+        # Con il catalogo locale i suggerimenti sono immediati
+        if self.catalog.ready:
+            items = self.catalog.search(text, 10)
+            if items:
+                self.update_autocomplete_list(items)
+                return
+        cached = self.autocomplete_cache.get(text, 10)
+        if cached is not None:
+            self.update_autocomplete_list(cached)
+            return
+        self.timer.start(300)  # Ritardo di 300ms per evitare troppe richieste
             
     def fetch_autocomplete(self):
         query = self.item_input.text().strip()
@@ -429,49 +2375,56 @@ class ManualSearchDialog(QDialog):
             self.autocomplete_list.clear()
             self.autocomplete_list.setVisible(False)
             return
+        cached = self.autocomplete_cache.get(query, 10)
+        if cached is not None:
+            self.update_autocomplete_list(cached)
+            return
             
         params = {'q': query, 'limit': 10}
-        url = f"{BACKEND_URL}/autocomplete?{urlencode(params)}"
-        self._autocomplete_worker = HttpWorker(self)
+        client = get_client()
+        seq = self._autocomplete_seq
         def _task():
-            resp = requests.get(url, timeout=5)
+            resp = client.get("/autocomplete", params=params)
             if resp.status_code != 200:
                 raise Exception(f"Status {resp.status_code}")
             return resp.json()
-        self._autocomplete_worker.success.connect(lambda items: self.update_autocomplete_list(items))
+        def _on_success(items):
+            self.autocomplete_cache.put(query, items, 10)
+            if seq == self._autocomplete_seq:
+                self.update_autocomplete_list(items)
         def _on_err(e):
             print("Error autocomplete:", e)
-            self.autocomplete_list.clear()
-            self.autocomplete_list.setVisible(False)
-        self._autocomplete_worker.error.connect(_on_err)
-        self._autocomplete_worker.run(_task)
+            if seq == self._autocomplete_seq:
+                self.autocomplete_list.clear()
+                self.autocomplete_list.setVisible(False)
+        # Ogni nuova query annulla quella precedente ancora in volo
+        self.executor.submit(('GET', '/autocomplete', query), _task,
+                             _on_success, _on_err, group='autocomplete')
             
     def update_autocomplete_list(self, items):
-        self.autocomplete_list.clear()
+        start = time.perf_counter()
+        lst = self.autocomplete_list
         if not items:
-            self.autocomplete_list.setVisible(False)
+            lst.clear()
+            lst.setVisible(False)
             return
             
-        for item in items:
-            list_item = QListWidgetItem()
-            self.autocomplete_list.addItem(list_item)
-            
-            # Crea widget semplificato senza icona
-            widget = QWidget()
-            layout = QHBoxLayout()
-            name_label = QLabel(item['display_name'])
-            name_label.setStyleSheet("color: white; font-size: 12px; padding: 4px;")
-            layout.addWidget(name_label)
-            widget.setLayout(layout)
-            
-            list_item.setSizeHint(widget.sizeHint())
-            
+        # Riusa le righe esistenti cambiandone solo testo e dati, senza widget per riga
+        lst.setUpdatesEnabled(False)
+        for row, item in enumerate(items):
+            list_item = lst.item(row)
+            if list_item is None:
+                list_item = QListWidgetItem()
+                lst.addItem(list_item)
+            list_item.setText(item['display_name'])
             # Salva i dati completi dell'item
             list_item.setData(Qt.UserRole, item)
+        while lst.count() > len(items):
+            lst.takeItem(lst.count() - 1)
+        lst.clearSelection()
+        lst.setUpdatesEnabled(True)
             
-            self.autocomplete_list.setItemWidget(list_item, widget)
-            
-        self.autocomplete_list.setVisible(True)
+        lst.setVisible(True)
         
         # Calcola l'altezza ottimale
         max_height = 300
@@ -482,16 +2435,29 @@ class ManualSearchDialog(QDialog):
         # Aggiungi spazio pour il bordo e la barra di scorrimento
         total_height = min(item_height + 10, max_height)
         self.autocomplete_list.setFixedHeight(total_height)
+        METRICS.observe('slot', "update_autocomplete_list", time.perf_counter() - start)
         
     def select_autocomplete_item(self, item):
         item_data = item.data(Qt.UserRole)
         if item_data:
+            # Evita di rilanciare la ricerca per il testo appena scelto,
+            # e scarta le risposte ancora in arrivo per il testo precedente
+            self.timer.stop()
+            self._autocomplete_seq += 1
+            self.item_input.blockSignals(True)
             self.item_input.setText(item_data['display_name'])
+            self.item_input.blockSignals(False)
             
     def accept_autocomplete_item(self, item):
         self.select_autocomplete_item(item)
         self.autocomplete_list.setVisible(False)
     
+    def showEvent(self, event):
+        super().showEvent(event)
+        # La dialog viene riusata: ultima ricerca già selezionata, si scrive subito sopra
+        self.item_input.setFocus(Qt.PopupFocusReason)
+        self.item_input.selectAll()
+
     def keyPressEvent(self, event):
         if event.key() in (Qt.Key_Return, Qt.Key_Enter) and self.autocomplete_list.isVisible():
             selected_items = self.autocomplete_list.selectedItems()
@@ -503,59 +2469,18 @@ class ManualSearchDialog(QDialog):
             return
             
         super().keyPressEvent(event)
-    
-    def get_data(self):
-        return {
-            'item': self.item_input.text().strip(),
-            'rank_choice': self.rank_combo.currentText(),
-            'max_rank_override': self.max_rank_input.text().strip() or ""
-        }
 
-class SearchDialog(QDialog):
-    def __init__(self, parent=None):
+class ManualSearchDialog(AutocompleteMixin, QDialog):
+    def __init__(self, executor, parent=None):
         super().__init__(parent)
-        self.setWindowTitle("WM Sniper")
+        self.executor = executor
+        self.setWindowTitle("WM Search")
         self.setWindowFlags(self.windowFlags() & ~Qt.WindowContextHelpButtonHint)
-        self.setFixedSize(550, 400)  # Aumentato per più spazio
+        self.setFixedSize(550, 400)
         layout = QVBoxLayout()
         
         form = QFormLayout()
-        
-        # Campo per il nome dell'item con autocomplete
-        self.item_input = QLineEdit()
-        self.item_input.setPlaceholderText("Ex: Ash Prime Set")
-        self.item_input.setMinimumWidth(300)
-        self.item_input.textChanged.connect(self.on_text_changed)
-        form.addRow("Item:", self.item_input)
-        
-        # Lista per i risultati dell'autocomplete
-        self.autocomplete_list = QListWidget()
-        self.autocomplete_list.setVisible(False)
-        self.autocomplete_list.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.autocomplete_list.setStyleSheet("""
-            QListWidget { 
-                background-color: #222; 
-                color: white; 
-                border: 1px solid #444;
-                border-radius: 4px;
-                font-size: 12px;
-            }
-            QListWidget::item {
-                padding: 0px;
-                border-bottom: 1px solid #333;
-            }
-            QListWidget::item:selected {
-                background-color: #2a82da;
-            }
-        """)
-        self.autocomplete_list.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        self.autocomplete_list.itemClicked.connect(self.select_autocomplete_item)
-        self.autocomplete_list.itemDoubleClicked.connect(self.accept_autocomplete_item)
-        
-        # Campo per il prezzo massimo
-        self.max_price_input = QLineEdit()
-        self.max_price_input.setPlaceholderText("999999")
-        form.addRow("Higher Price:", self.max_price_input)
+        self._init_autocomplete(form)
         
         # Selezione per il rank
         self.rank_combo = QComboBox()
@@ -577,98 +2502,51 @@ class SearchDialog(QDialog):
         layout.addWidget(buttons)
         
         self.setLayout(layout)
-        self.timer = QTimer()
-        self.timer.setSingleShot(True)
-        self.timer.timeout.connect(self.fetch_autocomplete)
-        
-    def on_text_changed(self, text):
-        self.timer.stop()
-        if text.strip():
-            self.timer.start(300)  # Ritardo di 300ms per evitare troppe richieste
-        else:
-            self.autocomplete_list.clear()
-            self.autocomplete_list.setVisible(False)
-            
-    def fetch_autocomplete(self):
-        query = self.item_input.text().strip()
-        if not query:
-            self.autocomplete_list.clear()
-            self.autocomplete_list.setVisible(False)
-            return
-            
-        params = {'q': query, 'limit': 10}
-        url = f"{BACKEND_URL}/autocomplete?{urlencode(params)}"
-        self._autocomplete_worker = HttpWorker(self)
-        def _task():
-            resp = requests.get(url, timeout=5)
-            if resp.status_code != 200:
-                raise Exception(f"Status {resp.status_code}")
-            return resp.json()
-        self._autocomplete_worker.success.connect(lambda items: self.update_autocomplete_list(items))
-        def _on_err(e):
-            print("Error autocomplete:", e)
-            self.autocomplete_list.clear()
-            self.autocomplete_list.setVisible(False)
-        self._autocomplete_worker.error.connect(_on_err)
-        self._autocomplete_worker.run(_task)
-            
-    def update_autocomplete_list(self, items):
-        self.autocomplete_list.clear()
-        if not items:
-            self.autocomplete_list.setVisible(False)
-            return
-            
-        for item in items:
-            list_item = QListWidgetItem()
-            self.autocomplete_list.addItem(list_item)
-            
-            # Crea widget semplificato senza icona
-            widget = QWidget()
-            layout = QHBoxLayout()
-            name_label = QLabel(item['display_name'])
-            name_label.setStyleSheet("color: white; font-size: 12px; padding: 4px;")
-            layout.addWidget(name_label)
-            widget.setLayout(layout)
-            
-            list_item.setSizeHint(widget.sizeHint())
-            
-            # Salva i dati completi dell'item
-            list_item.setData(Qt.UserRole, item)
-            
-            self.autocomplete_list.setItemWidget(list_item, widget)
-            
-        self.autocomplete_list.setVisible(True)
+    
+    def get_data(self):
+        return {
+            'item': self.item_input.text().strip(),
+            'rank_choice': self.rank_combo.currentText(),
+            'max_rank_override': self.max_rank_input.text().strip() or ""
+        }
+
+class SearchDialog(AutocompleteMixin, QDialog):
+    def __init__(self, executor, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.setWindowTitle("WM Sniper")
+        self.setWindowFlags(self.windowFlags() & ~Qt.WindowContextHelpButtonHint)
+        self.setFixedSize(550, 400)  # Aumentato per più spazio
+        layout = QVBoxLayout()
         
-        # Calcola l'altezza ottimale
-        max_height = 300
-        item_height = 0
-        for i in range(self.autocomplete_list.count()):
-            item_height += self.autocomplete_list.sizeHintForRow(i)
+        form = QFormLayout()
+        self._init_autocomplete(form)
         
-        # Aggiungi spazio pour il bordo e la barra di scorrimento
-        total_height = min(item_height + 10, max_height)
-        self.autocomplete_list.setFixedHeight(total_height)
+        # Campo per il prezzo massimo
+        self.max_price_input = QLineEdit()
+        self.max_price_input.setPlaceholderText("999999")
+        form.addRow("Higher Price:", self.max_price_input)
         
-    def select_autocomplete_item(self, item):
-        item_data = item.data(Qt.UserRole)
-        if item_data:
-            self.item_input.setText(item_data['display_name'])
-            
-    def accept_autocomplete_item(self, item):
-        self.select_autocomplete_item(item)
-        self.autocomplete_list.setVisible(False)
-    
-    def keyPressEvent(self, event):
-        if event.key() in (Qt.Key_Return, Qt.Key_Enter) and self.autocomplete_list.isVisible():
-            selected_items = self.autocomplete_list.selectedItems()
-            if selected_items:
-                self.accept_autocomplete_item(selected_items[0])
-                return
-        elif event.key() == Qt.Key_Escape and self.autocomplete_list.isVisible():
-            self.autocomplete_list.setVisible(False)
-            return
-            
-        super().keyPressEvent(event)
+        # Selezione per il rank
+        self.rank_combo = QComboBox()
+        self.rank_combo.addItems(["All", "Maxed"])
+        form.addRow("Rank:", self.rank_combo)
+        
+        # Campo per l'override del max rank
+        self.max_rank_input = QLineEdit()
+        self.max_rank_input.setPlaceholderText("3/5/10")
+        form.addRow("Max Rank Override:", self.max_rank_input)
+        
+        layout.addLayout(form)
+        layout.addWidget(self.autocomplete_list)
+        
+        # Pulsanti OK/Cancel
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        
+        self.setLayout(layout)
     
     def get_data(self):
         return {
@@ -678,127 +2556,496 @@ class SearchDialog(QDialog):
             'max_rank_override': self.max_rank_input.text().strip() or ""
         }
 
+class WatchlistDialog(QDialog):
+    """Watchlist modificabile, con import/export e avvio/stop di tutte le voci insieme"""
+    startRequested = pyqtSignal(object)
+    stopRequested = pyqtSignal(object)
+
+    COLUMNS = ("Item", "Max Price", "Rank", "Max Rank", "Status")
+
+    def __init__(self, watchlist, parent=None):
+        super().__init__(parent)
+        self.watchlist = watchlist
+        self.setWindowTitle("Watchlist")
+        self.setWindowFlags(self.windowFlags() & ~Qt.WindowContextHelpButtonHint)
+        self.resize(650, 450)
+        layout = QVBoxLayout()
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        layout.addWidget(self.table)
+
+        edit_bar = QHBoxLayout()
+        for text, slot in (("Add", self.add_row), ("Remove", self.remove_selected),
+                           ("Import...", self.import_file), ("Export...", self.export_file)):
+            btn = QPushButton(text)
+            btn.clicked.connect(lambda _, slot=slot: slot())
+            edit_bar.addWidget(btn)
+        layout.addLayout(edit_bar)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        run_bar = QHBoxLayout()
+        self.start_btn = QPushButton("Start all")
+        self.start_btn.clicked.connect(lambda: self.request('start'))
+        self.stop_btn = QPushButton("Stop all")
+        self.stop_btn.clicked.connect(lambda: self.request('stop'))
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        run_bar.addWidget(self.start_btn)
+        run_bar.addWidget(self.stop_btn)
+        run_bar.addStretch(1)
+        run_bar.addWidget(close_btn)
+        layout.addLayout(run_bar)
+
+        self.setLayout(layout)
+        self.set_entries(watchlist.entries)
+
+    def add_row(self, entry=None):
+        entry = entry or watch_entry({'item': "?"})
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, 0, QTableWidgetItem("" if entry['item'] == "?" else entry['item']))
+        self.table.setItem(row, 1, QTableWidgetItem(entry['max_price']))
+        rank = QComboBox()
+        rank.addItems(["All", "Maxed"])
+        rank.setCurrentText(entry['rank_choice'])
+        self.table.setCellWidget(row, 2, rank)
+        self.table.setItem(row, 3, QTableWidgetItem(entry['max_rank_override']))
+        status = QTableWidgetItem("")
+        status.setFlags(status.flags() & ~Qt.ItemIsEditable)
+        self.table.setItem(row, 4, status)
+
+    def remove_selected(self):
+        for row in sorted({i.row() for i in self.table.selectedIndexes()}, reverse=True):
+            self.table.removeRow(row)
+        self.save()
+
+    def set_entries(self, entries):
+        self.table.setRowCount(0)
+        for entry in entries:
+            self.add_row(entry)
+
+    def entries(self):
+        entries = []
+        for row in range(self.table.rowCount()):
+            cell = lambda col: (self.table.item(row, col).text() if self.table.item(row, col) else "")
+            entry = watch_entry({'item': cell(0), 'max_price': cell(1),
+                                 'rank_choice': self.table.cellWidget(row, 2).currentText(),
+                                 'max_rank_override': cell(3)})
+            if entry:
+                entries.append(entry)
+        return entries
+
+    def save(self):
+        self.watchlist.set_entries(self.entries())
+        try:
+            self.watchlist.save()
+        except OSError as e:
+            print("Watchlist save error:", e)
+
+    def import_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import watchlist", "",
+                                              "Watchlist (*.json *.csv *.txt);;All files (*)")
+        if not path:
+            return
+        try:
+            self.watchlist.set_entries(Watchlist.read_file(path))
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Watchlist", f"Import failed: {e}")
+            return
+        self.set_entries(self.watchlist.entries)
+        self.save()
+        self.status_label.setText(f"Imported {len(self.watchlist.entries)} items")
+
+    def export_file(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export watchlist", "watchlist.json",
+                                              "JSON (*.json);;CSV (*.csv)")
+        if not path:
+            return
+        self.save()
+        try:
+            Watchlist.write_file(path, self.watchlist.entries)
+        except OSError as e:
+            QMessageBox.warning(self, "Watchlist", f"Export failed: {e}")
+            return
+        self.status_label.setText(f"Exported {len(self.watchlist.entries)} items")
+
+    def request(self, action):
+        self.save()
+        entries = self.watchlist.entries
+        if not entries:
+            self.status_label.setText("The watchlist is empty")
+            return
+        for row in range(self.table.rowCount()):
+            self.table.item(row, 4).setText("...")
+        self.start_btn.setEnabled(False)
+        self.stop_btn.setEnabled(False)
+        self.status_label.setText(f"{'Starting' if action == 'start' else 'Stopping'} {len(entries)} items...")
+        (self.startRequested if action == 'start' else self.stopRequested).emit(list(entries))
+
+    def show_results(self, action, results, elapsed):
+        by_url = {item_url: (ok, message) for item_url, ok, message in results}
+        done = "Started" if action == 'start' else "Stopped"
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 0)
+            result = by_url.get(to_item_url(item.text().strip())) if item else None
+            if result is None:
+                continue
+            ok, message = result
+            status = self.table.item(row, 4)
+            status.setText(done if ok else f"Error: {message}")
+            status.setForeground(QColor("#2ecc71" if ok else "#e74c3c"))
+        ok_count = sum(1 for _, ok, _ in results if ok)
+        self.status_label.setText(f"{done} {ok_count}/{len(results)} items in {elapsed:.1f} s")
+        self.start_btn.setEnabled(True)
+        self.stop_btn.setEnabled(True)
+
+    def show_error(self, message):
+        self.status_label.setText(f"Error: {message}")
+        self.start_btn.setEnabled(True)
+        self.stop_btn.setEnabled(True)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.save()
+
+class ManualItemGroup(QWidget):
+    """Item seguito nel tab Warframe Market: intestazione comprimibile e migliori offerte"""
+    closeRequested = pyqtSignal(object)
+    collapsedChanged = pyqtSignal(object)
+
+    def __init__(self, item_name, rank_choice, max_rank_override, on_action, parent=None):
+        super().__init__(parent)
+        self.differ = OfferListDiffer(limit=10)
+        self.collapsed = False
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 4)
+        layout.setSpacing(0)
+
+        header = QHBoxLayout()
+        self.header_btn = QPushButton()
+        self.header_btn.setObjectName("groupHeader")
+        self.header_btn.clicked.connect(lambda: self.set_collapsed(not self.collapsed))
+        self.status_label = QLabel("Loading...")
+        self.status_label.setObjectName("groupStatus")
+        close_btn = QPushButton("✕")
+        close_btn.setObjectName("groupClose")
+        close_btn.setToolTip("Stop following this item")
+        close_btn.clicked.connect(lambda: self.closeRequested.emit(self))
+        header.addWidget(self.header_btn, 1)
+        header.addWidget(self.status_label)
+        header.addWidget(close_btn)
+        layout.addLayout(header)
+
+        self.offer_model = OfferListModel(self)
+        self.offer_view = make_offer_view(self.offer_model, ('copy', 'remove'),
+                                          lambda action, offer: on_action(self, action, offer),
+                                          (get_price_history('market'),))
+        # Altezza pari alle righe: lo scroll è quello del tab, non della singola lista
+        self.offer_view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        for signal in (self.offer_model.rowsInserted, self.offer_model.rowsRemoved, self.offer_model.modelReset):
+            signal.connect(self._fit_view)
+        layout.addWidget(self.offer_view)
+        self.setLayout(layout)
+        self._fit_view()
+        self.set_search(item_name, rank_choice, max_rank_override)
+
+    @property
+    def task_name(self):
+        return f"manual_offers:{self.item_url}"
+
+    def set_search(self, item_name, rank_choice, max_rank_override):
+        self.item_name = item_name
+        self.item_url = to_item_url(item_name)
+        self.rank_choice = rank_choice
+        self.max_rank_override = max_rank_override or ""
+        self._update_header()
+
+    def params(self):
+        params = {
+            'item_url': self.item_url,
+            'rank': self.rank_choice.lower(),
+            'limit': 10  # Limita a 10 offerte
+        }
+        # Aggiungi max_rank_override se specificato e se il rank è Maxed
+        if self.rank_choice == "Maxed" and self.max_rank_override.strip():
+            params['max_rank_override'] = self.max_rank_override.strip()
+        return params
+
+    def set_collapsed(self, collapsed):
+        changed = collapsed != self.collapsed
+        self.collapsed = collapsed
+        self.offer_view.setVisible(not collapsed)
+        self._update_header()
+        if changed:
+            self.collapsedChanged.emit(self)
+
+    def _update_header(self):
+        arrow = "▸" if self.collapsed else "▾"
+        rank = f" ({self.rank_choice})" if self.rank_choice != "All" else ""
+        self.header_btn.setText(f"{arrow} {self.item_name}{rank}")
+
+    def _fit_view(self):
+        rows = max(1, self.offer_model.rowCount())
+        self.offer_view.setFixedHeight(rows * OfferDelegate.ROW_HEIGHT + 4)
+
+    def is_expanded_on_screen(self):
+        return not self.collapsed and self.isVisible()
+
+
 class ManualSearchTab(QWidget):
-    def __init__(self, user_id, parent=None):
+    def __init__(self, executor, scheduler, parent=None):
         super().__init__(parent)
-        self.user_id = user_id
-        self.current_item = None
-        self.current_rank = "All"
-        self.displayed_offers = {}
-        self.stopped_items = set()
+        self.executor = executor
+        self.scheduler = scheduler
+        self.groups = OrderedDict()  # item_url -> ManualItemGroup, dal più vecchio
+        
+        # Risultati recenti su disco: mostrati subito, poi aggiornati
+        self.cache = OfferCache()
+        self.cache.load()
+        self.cache_timer = QTimer(self)
+        self.cache_timer.setSingleShot(True)
+        self.cache_timer.timeout.connect(self._save_cache)
+        QApplication.instance().aboutToQuit.connect(self.cache.save)
         
         layout = QVBoxLayout()
         layout.setContentsMargins(5, 5, 5, 5)
         
         # Etichetta informazioni
         self.info_label = QLabel("Use the search button above to find items")
-        self.info_label.setStyleSheet("color: white; font-size: 10pt; padding: 5px;")
+        self.info_label.setObjectName("infoLabel")
         self.info_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.info_label)
         
-        # Area scroll per i risultati
+        # Un gruppo per ogni item seguito
+        self.groups_box = QVBoxLayout()
+        self.groups_box.setContentsMargins(0, 0, 0, 0)
+        self.groups_box.addStretch(1)
+        content = QWidget()
+        content.setObjectName("manualGroupsContent")
+        content.setLayout(self.groups_box)
         self.scroll = QScrollArea()
+        self.scroll.setObjectName("manualGroups")
         self.scroll.setWidgetResizable(True)
-        self.scroll.setStyleSheet("background-color: rgba(30,30,30,150); border-radius: 5px;")
-        
-        self.content = QWidget()
-        self.vbox = QVBoxLayout()
-        self.vbox.setAlignment(Qt.AlignTop)
-        self.content.setLayout(self.vbox)
-        self.scroll.setWidget(self.content)
+        self.scroll.setWidget(content)
         
         layout.addWidget(self.scroll)
         self.setLayout(layout)
-        
-        # Timer per aggiornamento periodico
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.refresh_offers)
-        self.timer.start(10000)  # Aggiorna ogni 10 secondi
-    
+
     def search_offers(self, item_name, rank_choice, max_rank_override=""):
+        """Segue un item (o ne aggiorna i filtri se è già seguito)"""
         if not item_name:
             self.info_label.setText("Please enter a valid item name")
             return
-            
-        self.current_item = item_name
-        self.current_rank = rank_choice
-        self.max_rank_override = max_rank_override
-        self.info_label.setText(f"Research in progress for: {item_name}...")
         
-        # Reset stopped items se è un nuovo item
         item_url = to_item_url(item_name)
-        if item_url not in self.stopped_items:
-            self.stopped_items.discard(item_url)
-        
-        self.refresh_offers()
-    
-    def refresh_offers(self):
-        if not self.current_item:
+        group = self.groups.get(item_url)
+        if group is not None:
+            group.set_search(item_name, rank_choice, max_rank_override)
+            group.set_collapsed(False)
+        else:
+            if len(self.groups) >= MANUAL_MAX_PINS:
+                # Oltre il limite smette di seguire l'item più vecchio
+                self.unpin(next(iter(self.groups.values())))
+            group = ManualItemGroup(item_name, rank_choice, max_rank_override, self._on_offer_action)
+            group.closeRequested.connect(self.unpin)
+            group.collapsedChanged.connect(self._on_group_collapsed)
+            self.groups[item_url] = group
+            self.groups_box.insertWidget(self.groups_box.count() - 1, group)
+            # Aggiornamento periodico (ogni 10 secondi a gruppo visibile e aperto, fermo se chiuso)
+            self.scheduler.register(group.task_name, lambda: self.refresh_offers(item_url),
+                                    MANUAL_REFRESH_INTERVAL, min_interval=5, max_interval=300,
+                                    is_visible=group.is_expanded_on_screen)
+        self.info_label.setText(f"Following {len(self.groups)}/{MANUAL_MAX_PINS} items")
+        self._show_cached(group)
+        
+        self.scheduler.boost(group.task_name)
+        self.scheduler.trigger(group.task_name)
+        # Gli altri item ripartono sfasati: mai tutti nello stesso tick
+        self.scheduler.stagger([g.task_name for g in self.groups.values() if g is not group] + [group.task_name])
+
+    def _show_cached(self, group):
+        """Mostra l'ultimo risultato salvato per questa ricerca, in attesa del refresh"""
+        cached = self.cache.get(OfferCache.key(group.params()))
+        if cached is None:
+            group.status_label.setText("Loading...")
             return
-        
-        item_url = to_item_url(self.current_item)
-        
-        # Se l'item è stato stoppato, non aggiornare
-        if item_url in self.stopped_items:
+        offers, total, ts = cached
+        self.display_offers(group, group.differ.patch(offers, total), cached_at=ts)
+
+    def _save_cache(self):
+        def _on_error(e):
+            print("Offer cache save error:", e)
+        self.executor.submit(('SAVE', 'offer_cache'), self.cache.save, None, _on_error)
+
+    def _on_group_collapsed(self, group):
+        # Un gruppo chiuso non si vede: niente poll (né banda); riaprendolo si aggiorna subito
+        if group.collapsed:
+            self.scheduler.pause(group.task_name)
+        else:
+            self.scheduler.resume(group.task_name)
+
+    def unpin(self, group):
+        if self.groups.get(group.item_url) is not group:
+            return
+        del self.groups[group.item_url]
+        self.scheduler.unregister(group.task_name)
+        self.groups_box.removeWidget(group)
+        group.deleteLater()
+        self.scheduler.stagger([g.task_name for g in self.groups.values()])
+        self.info_label.setText(f"Following {len(self.groups)}/{MANUAL_MAX_PINS} items" if self.groups
+                                else "Use the search button above to find items")
+
+    def refresh_offers(self, item_url):
+        group = self.groups.get(item_url)
+        if group is None:
             return
         
         # Prepara i parametri della richiesta
-        params = {
-            'item_url': item_url,
-            'rank': self.current_rank.lower(),
-            'limit': 10  # Limita a 10 offerte
-        }
-        # Aggiungi max_rank_override se specificato e se il rank è Maxed
-        if self.current_rank == "Maxed" and self.max_rank_override.strip():
-            params['max_rank_override'] = self.max_rank_override.strip()
+        params = group.params()
         # Aggiungi filtri preimpostati
         filters = {
             'seller_status': 'ingame',
             'online_only': 'true'
         }
-        headers = {'X-User-ID': self.user_id} if self.user_id else {}
-        self._offers_worker = HttpWorker(self)
+        client = get_client()
+        differ = group.differ
+        history = get_price_history('market')
         def _task():
-            resp = requests.get(
-                f"{BACKEND_URL}/manual_offers",
+            resp = client.get(
+                "/manual_offers",
                 params={**params, **filters},
-                headers=headers,
-                timeout=10
+                timeout=HTTP_SLOW_READ_TIMEOUT
             )
             if resp.status_code != 200:
                 raise Exception(f"Search Error: {resp.status_code}")
-            return resp.json()
-        self._offers_worker.success.connect(lambda offers: self.display_offers(offers))
-        self._offers_worker.error.connect(lambda e: self.info_label.setText(f"Connection Error: {str(e)}"))
-        self._offers_worker.run(_task)
+            # Decodifica, storico, ordinamento e diff restano nel worker
+            offers = parse_offers(resp.json())
+            history.record(item_url, [o.price for o in offers])
+            return differ.patch(offers)
+        # Ogni item ha il suo gruppo di richieste: i fetch dei vari item corrono in parallelo
+        # sul pool condiviso, e un refresh con gli stessi parametri si aggancia a quello in volo
+        def _on_success(patch):
+            if self.groups.get(item_url) is not group:
+                return  # item non più seguito
+            # Offerte cambiate = attività: il refresh resta rapido mentre il mercato si muove
+            self.scheduler.report(group.task_name, ok=True, activity=bool(patch.ops))
+            self.display_offers(group, patch)
+            self.cache.put(OfferCache.key(params), patch.by_key.values(), patch.total)
+            if not self.cache_timer.isActive():
+                self.cache_timer.start(OFFER_CACHE_SAVE_DELAY * 1000)
+        def _on_error(e):
+            if self.groups.get(item_url) is not group:
+                return
+            self.scheduler.report(group.task_name, ok=False)
+            group.status_label.setText(f"Connection Error: {str(e)}")
+        key = ('GET', '/manual_offers', tuple(sorted(params.items())))
+        self.executor.submit(key, _task, _on_success, _on_error, group=group.task_name)
     
-    def display_offers(self, offers):
-        # Pulisci i risultati precedenti
-        for i in reversed(range(self.vbox.count())):
-            widget = self.vbox.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-                widget.deleteLater()
-        
-        if not offers:
-            self.info_label.setText("No offers found")
+    def _on_offer_action(self, group, action, offer):
+        if action == 'copy':
+            copy_to_clipboard(offer_message(offer))
+        elif action == 'remove':
+            group.offer_model.remove_offer(offer)
+            group.differ.reset(group.offer_model.keys())
+
+    def display_offers(self, group, patch, cached_at=None):
+        # Il thread UI applica solo la patch già calcolata nel worker
+        group.offer_model.apply_offer_patch(patch)
+        if not patch.total:
+            text = "No offers found"
+        else:
+            text = f"Found {patch.total} Offers - Show {len(patch.keys)}"
+        if cached_at is not None:
+            # Dati dalla cache: l'età resta visibile finché arriva il refresh
+            text += f" ({format_age(time.time() - cached_at)} old, refreshing...)"
+        group.status_label.setText(text)
+
+class StatsTab(QWidget):
+    """Tab nascosto con le metriche di richieste, slot UI e render (Ctrl+Shift+S)"""
+
+    COLUMNS = ("Kind", "Name", "Count", "Errors", "KB", "p50 ms", "p95 ms", "p99 ms", "Max ms")
+
+    def __init__(self, metrics, parent=None):
+        super().__init__(parent)
+        self.metrics = metrics
+        layout = QVBoxLayout()
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        bar = QHBoxLayout()
+        self.summary_label = QLabel()
+        self.summary_label.setObjectName("groupStatus")
+        export_btn = QPushButton("Export JSONL...")
+        export_btn.clicked.connect(self.export)
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset)
+        bar.addWidget(self.summary_label, 1)
+        bar.addWidget(export_btn)
+        bar.addWidget(reset_btn)
+        layout.addLayout(bar)
+        self.setLayout(layout)
+
+        # Aggiornato solo mentre è visibile
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        rows = [(kind, name, summary) for kind, series in self.metrics.snapshot().items()
+                for name, summary in series.items()]
+        self.table.setRowCount(len(rows))
+        for row, (kind, name, summary) in enumerate(rows):
+            values = (kind, name, summary['count'], summary['errors'],
+                      round(summary['bytes'] / 1024, 1) if summary['bytes'] else "",
+                      summary['p50_ms'], summary['p95_ms'], summary['p99_ms'], summary['max_ms'])
+            for col, value in enumerate(values):
+                cell = self.table.item(row, col)
+                if cell is None:
+                    cell = QTableWidgetItem()
+                    self.table.setItem(row, col, cell)
+                cell.setText("" if value is None else str(value))
+        requests_count = sum(summary['count'] for kind, _, summary in rows if kind == 'request')
+        errors = sum(summary['errors'] for kind, _, summary in rows if kind == 'request')
+        uptime = int(time.time() - self.metrics.started)
+        self.summary_label.setText(f"{requests_count} requests, {errors} errors in {uptime // 60} min")
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export metrics", data_path("metrics.jsonl"),
+                                              "JSON lines (*.jsonl);;All files (*)")
+        if not path:
             return
-            
-        # Ordina le offerte per prezzo (crescente)
-        sorted_offers = sorted(offers, key=lambda x: x.get('price', 999999))
-        
-        # Mostra le prime 10 offerte
-        displayed_count = min(10, len(sorted_offers))
-        self.info_label.setText(f"Found {len(offers)} Offers - Show {displayed_count}")
-        
-        # Aggiungi i widget delle offerte
-        for offer in sorted_offers[:displayed_count]:
-            widget = ManualOfferWidget(offer, self)
-            self.vbox.addWidget(widget)
-            item_url = offer.get('item')
-            if item_url not in self.displayed_offers:
-                self.displayed_offers[item_url] = []
-            self.displayed_offers[item_url].append(widget)
+        try:
+            count = self.metrics.export_jsonl(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Stats", f"Export failed: {e}")
+            return
+        self.summary_label.setText(f"Exported {count} series to {os.path.basename(path)}")
+
+    def reset(self):
+        self.metrics.reset()
+        self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start(1000)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
 
 class Overlay(QWidget):
     def __init__(self, user_id):
@@ -813,7 +3060,18 @@ class Overlay(QWidget):
         self.setFixedSize(500, 350)  # Dimensioni aumentate per la nuova UI
 
         self.drag_position = None
-        self.offers_by_item = {}  # Tieni traccia degli widget per item
+        # offerte mostrate, per item, e chiavi notificate/soppresse riprese dalla sessione precedente
+        self.match_store = MatchStateStore()
+        self.matches = MatchIndex(self.match_store)
+        self.matches.restore(self.match_store.load())
+        self.watched_items = set()   # item avviati in questa sessione (per "Stop all")
+
+        # Pool condiviso per tutte le richieste al backend
+        self.executor = RequestExecutor(parent=self)
+        QApplication.instance().aboutToQuit.connect(self.executor.shutdown)
+        # Tutti i fetch periodici passano dallo scheduler adattivo
+        self.scheduler = PollScheduler(parent=self)
+        QApplication.instance().aboutToQuit.connect(self.scheduler.stop)
 
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(5, 5, 5, 5)
@@ -821,40 +3079,22 @@ class Overlay(QWidget):
         # Barra superiore con pulsante nuova ricerca
         top_bar = QHBoxLayout()
         self.new_search_btn = QPushButton("WM Sniper")
-        self.new_search_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3498db; 
-                color: white; 
-                font-weight: bold;
-                padding: 5px;
-                border-radius: 3px;
-            }
-            QPushButton:hover {
-                background-color: #2980b9;
-            }
-        """)
+        self.new_search_btn.setObjectName("newSearchButton")
         self.new_search_btn.clicked.connect(self.open_search_dialog)
         top_bar.addWidget(self.new_search_btn)
         
+        # Watchlist: avvio/stop di molti item insieme
+        self.watchlist = Watchlist()
+        self.watchlist_dialog = None
+        self.watchlist_btn = QPushButton("Watchlist")
+        self.watchlist_btn.setObjectName("watchlistButton")
+        self.watchlist_btn.clicked.connect(self.open_watchlist)
+        top_bar.addWidget(self.watchlist_btn)
+        
         # Pulsante Chiudi Applicazione
         self.close_app_button = QPushButton("✕")
         self.close_app_button.setToolTip("Close")
-        self.close_app_button.setStyleSheet("""
-            QPushButton {
-                background-color: #e74c3c;
-                color: white;
-                font-weight: bold;
-                font-size: 12px;
-                border-radius: 3px;
-                min-width: 24px;
-                max-width: 24px;
-                min-height: 24px;
-                max-height: 24px;
-            }
-            QPushButton:hover {
-                background-color: #c0392b;
-            }
-        """)
+        self.close_app_button.setObjectName("closeAppButton")
         self.close_app_button.clicked.connect(QApplication.instance().quit)
         top_bar.addWidget(self.close_app_button)
         
@@ -862,65 +3102,160 @@ class Overlay(QWidget):
         
         # Sistema a tab
         self.tabs = QTabWidget()
-        self.tabs.setStyleSheet("""
-            QTabWidget::pane {
-                border: 1px solid #444;
-                background: rgba(30, 30, 30, 200);
-            }
-            QTabBar::tab {
-                background: rgba(50, 50, 50, 200);
-                color: white;
-                padding: 8px;
-                border-top-left-radius: 4px;
-                border-top-right-radius: 4px;
-            }
-            QTabBar::tab:selected {
-                background: rgba(70, 70, 70, 200);
-                border-bottom: 2px solid #3498db;
-            }
-        """)
+        self.tabs.setObjectName("overlayTabs")
         
         # Tab Sniper
         self.sniper_tab = QWidget()
         sniper_layout = QVBoxLayout()
         sniper_layout.setContentsMargins(0, 0, 0, 0)
         
-        # Area scroll per le offerte
-        self.scroll = QScrollArea()
-        self.scroll.setWidgetResizable(True)
-        self.scroll.setStyleSheet("background-color: rgba(30,30,30,150); border-radius: 5px;")
-        
-        self.content = QWidget()
-        self.vbox = QVBoxLayout()
-        self.vbox.setAlignment(Qt.AlignTop)
-        self.content.setLayout(self.vbox)
-        self.scroll.setWidget(self.content)
-        
-        sniper_layout.addWidget(self.scroll)
+        # Lista virtualizzata delle offerte
+        self.offer_model = OfferListModel(self)
+        # badge e sparkline: prima lo storico del mercato completo, altrimenti quello dei match
+        self.offer_view = make_offer_view(self.offer_model, ('copy', 'remove', 'stop'), self._on_offer_action,
+                                          (get_price_history('market'), get_price_history('matches')))
+        self.offer_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        
+        # Stop di più item insieme
+        stop_bar = QHBoxLayout()
+        stop_bar.setContentsMargins(0, 2, 0, 2)
+        self.stop_selected_btn = QPushButton("Stop selected")
+        self.stop_selected_btn.setObjectName("stopButton")
+        self.stop_selected_btn.setToolTip("Stop the searches of the selected offers")
+        self.stop_selected_btn.clicked.connect(self.stop_selected)
+        self.stop_all_btn = QPushButton("Stop all")
+        self.stop_all_btn.setObjectName("stopButton")
+        self.stop_all_btn.setToolTip("Stop every search started in this session")
+        self.stop_all_btn.clicked.connect(self.stop_all)
+        stop_bar.addStretch(1)
+        stop_bar.addWidget(self.stop_selected_btn)
+        stop_bar.addWidget(self.stop_all_btn)
+        
+        # Match ricevuti ma non ancora inseriti nella lista (chiave -> Offer, i primi escono prima)
+        self.pending_rows = OrderedDict()
+        self.pending_since = None  # richiesta più vecchia con righe ancora in coda
+        self.drain_timer = QTimer(self)
+        self.drain_timer.setSingleShot(True)
+        self.drain_timer.timeout.connect(self._drain_pending_rows)
+        self.pending_label = QLabel()
+        self.pending_label.setObjectName("pendingLabel")
+        self.pending_label.hide()
+        
+        sniper_layout.addLayout(stop_bar)
+        sniper_layout.addWidget(self.offer_view)
+        sniper_layout.addWidget(self.pending_label)
         self.sniper_tab.setLayout(sniper_layout)
         
-        # Tab Ricerca Manuale
-        self.manual_tab = ManualSearchTab(self.user_id)
+        # Tab Ricerca Manuale: costruita (con il suo timer) solo alla prima apertura
+        self.manual_tab = None
+        self.manual_container = QWidget()
+        manual_layout = QVBoxLayout()
+        manual_layout.setContentsMargins(0, 0, 0, 0)
+        self.manual_container.setLayout(manual_layout)
         
         # Aggiungi i tab
         self.tabs.addTab(self.sniper_tab, "Sniper")
-        self.tabs.addTab(self.manual_tab, "Warframe Market")
+        self.tabs.addTab(self.manual_container, "Warframe Market")
         
         main_layout.addWidget(self.tabs)
         self.setLayout(main_layout)
 
-        self.notified_items = set()
-        self.suppressed_items = set()  # ids temporaneamente soppressi fino al restart
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_notifications)
-        self.timer.start(CHECK_INTERVAL * 1000)
+        self.match_sync = MatchSync(get_client(), get_price_history('matches'))
+        # prioritario: il budget di banda non lo rallenta oltre il budget di latenza
+        self.scheduler.register('matches', self.check_notifications, CHECK_INTERVAL,
+                                min_interval=2, max_interval=120, is_visible=self.isVisible, priority=True)
+
+        # Stato dei match su disco: scritture raggruppate e compattazione periodica
+        self.state_timer = QTimer(self)
+        self.state_timer.timeout.connect(self._flush_match_state)
+        self.state_timer.start(MATCH_STATE_FLUSH_INTERVAL * 1000)
+        self.last_compact = time.monotonic()
+        QApplication.instance().aboutToQuit.connect(self.match_store.close)
+        # Storici prezzi: salvati di tanto in tanto e all'uscita; le sparkline si ridisegnano
+        self.history_timer = QTimer(self)
+        self.history_timer.timeout.connect(self._save_price_history)
+        self.history_timer.start(HISTORY_SAVE_INTERVAL * 1000)
+        for source in ('market', 'matches'):
+            QApplication.instance().aboutToQuit.connect(get_price_history(source).save)
+
+        # Catalogo item per l'autocomplete locale: prima da disco, poi controllo versione
+        self.load_catalog()
+
+        # Ricezione push dei match, con il polling come ripiego
+        self.match_stream = MatchStream(get_client(), self.match_sync, parent=self)
+        self.match_stream.delta.connect(self._on_stream_delta)
+        self.match_stream.connected.connect(self._on_stream_connected)
+        self.match_stream.disconnected.connect(self._on_stream_disconnected)
+        self.match_stream.resync.connect(lambda: self.check_notifications(resync=True))
+        self.match_stream.unavailable.connect(self._on_stream_disconnected)
+        QApplication.instance().aboutToQuit.connect(self.match_stream.stop)
+        if MATCH_STREAM_ENABLED:
+            self.match_stream.start()
         
         # Cambia il testo del pulsante in base alla tab selezionata
         self.tabs.currentChanged.connect(self.update_button_text)
+        self.tabs.currentChanged.connect(self._on_tab_changed)
+        self.tabs.currentChanged.connect(lambda _: self.scheduler.refresh())
+        
+        # Tab Stats nascosto: compare e scompare con Ctrl+Shift+S
+        self.stats_tab = None
+        self.stats_shortcut = QShortcut(QKeySequence("Ctrl+Shift+S"), self)
+        self.stats_shortcut.activated.connect(self.toggle_stats_tab)
+        
+        # Dialog di ricerca create una volta sola, appena l'event loop è libero
+        self.search_dialog = None
+        self.manual_search_dialog = None
+        QTimer.singleShot(0, self.get_search_dialog)
+        QTimer.singleShot(0, self.get_manual_search_dialog)
         
         # Nascondi inizialmente l'overlay
         self.hide()
 
+    def load_catalog(self):
+        catalog = get_catalog()
+        client = get_client()
+        def _task():
+            if not catalog.ready:
+                catalog.load()
+            return catalog.refresh(client)
+        def _on_error(e):
+            print("Catalog update error:", e)
+        self.executor.submit(('GET', '/catalog'), _task, None, _on_error)
+
+    def get_search_dialog(self):
+        if self.search_dialog is None:
+            self.search_dialog = SearchDialog(self.executor, self)
+            # stile e layout calcolati ora, non alla prima apertura
+            self.search_dialog.ensurePolished()
+            self.search_dialog.layout().activate()
+        return self.search_dialog
+
+    def get_manual_search_dialog(self):
+        if self.manual_search_dialog is None:
+            self.manual_search_dialog = ManualSearchDialog(self.executor, self)
+            self.manual_search_dialog.ensurePolished()
+            self.manual_search_dialog.layout().activate()
+        return self.manual_search_dialog
+
+    def toggle_stats_tab(self):
+        if self.stats_tab is None:
+            self.stats_tab = StatsTab(METRICS)
+        index = self.tabs.indexOf(self.stats_tab)
+        if index == -1:
+            self.tabs.setCurrentIndex(self.tabs.addTab(self.stats_tab, "Stats"))
+        else:
+            self.tabs.removeTab(index)
+
+    def ensure_manual_tab(self):
+        if self.manual_tab is None:
+            self.manual_tab = ManualSearchTab(self.executor, self.scheduler)
+            self.manual_container.layout().addWidget(self.manual_tab)
+        return self.manual_tab
+
+    def _on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.manual_container:
+            self.ensure_manual_tab()
+
     def update_button_text(self, index):
         if index == 0:  # Tab Sniper
             self.new_search_btn.setText("WM Sniper")
@@ -938,101 +3273,234 @@ class Overlay(QWidget):
             self.move(event.globalPos() - self.drag_position)
             event.accept()
 
-    def _remove_widget_by_msg_id(self, msg_id):
+    def _on_offer_action(self, action, offer):
+        if action == 'copy':
+            copy_to_clipboard(offer_message(offer))
+        elif action == 'remove':
+            self.remove_offer(offer)
+        elif action == 'stop':
+            self.stop_search(offer.item)
+
+    def remove_offer(self, offer):
+        """Sopprimi temporaneamente questa notifica (riapparirà al prossimo start_watch)"""
+        key = offer.key
+        self.matches.suppress(key)
+        self.matches.discard(key)
+        self.offer_model.remove_keys((key,))
+
+    def stop_search(self, item_url):
+        self.stop_items([item_url])
+
+    def stop_selected(self):
+        items = [self.offer_model.offer_at(i.row()).item for i in self.offer_view.selectionModel().selectedRows()]
+        if items:
+            self.stop_items(items)
+
+    def stop_all(self):
+        items = self.watched_items.union(self.matches.by_item)
+        if items:
+            self.stop_items(sorted(items))
+
+    def stop_items(self, item_urls, on_done=None):
         """
-        Rimuove il widget corrispondente al msg_id (se esiste) da UI, from offers_by_item,
-        e dai set di tracking.
+        Ferma più ricerche con un solo batch (o stop e clear in parallelo).
+        Le righe spariscono subito e tornano se lo stop di quell'item fallisce.
+        on_done(results, secondi) riceve l'esito per item.
         """
-        # Cerca in offers_by_item
-        for item_url in list(self.offers_by_item.keys()):
-            widgets = list(self.offers_by_item.get(item_url, []))
-            for w in widgets:
-                try:
-                    wid_msg = f"{w.offer.get('item')}_{w.offer.get('seller')}_{w.offer.get('price')}"
-                except Exception:
-                    wid_msg = None
-                if wid_msg == msg_id:
-                    try:
-                        if w in self.offers_by_item.get(item_url, []):
-                            self.offers_by_item[item_url].remove(w)
-                        w.setParent(None)
-                        w.deleteLater()
-                    except Exception:
-                        pass
-            # se la lista è vuota, rimuovila
-            if not self.offers_by_item.get(item_url):
-                try:
-                    del self.offers_by_item[item_url]
-                except KeyError:
-                    pass
-        # Pulizia set
-        if msg_id in self.notified_items:
-            self.notified_items.remove(msg_id)
-        if msg_id in self.suppressed_items:
-            try:
-                self.suppressed_items.remove(msg_id)
-            except KeyError:
-                pass
-
-    def check_notifications(self):
-        headers = {'X-User-ID': self.user_id} if self.user_id else {}
-        self._matches_worker = HttpWorker(self)
+        item_urls = list(dict.fromkeys(item_urls))
+        removed = {item_url: self.remove_item_widgets(item_url) for item_url in item_urls}
+        was_watched = {item_url for item_url in item_urls if item_url in self.watched_items}
+        self.watched_items.difference_update(item_urls)
+        entries = [{'item': item_url} for item_url in item_urls]
+        client = get_client()
+        start = time.perf_counter()
         def _task():
-            resp = requests.get(f"{BACKEND_URL}/matches", headers=headers, timeout=5)
-            resp.raise_for_status()
-            return resp.json()
-        def _on_success(matches):
-            # Costruisci set di msg_id attuali riportati dal backend
-            current_msg_ids = set()
-            for m in matches:
-                msg_id = f"{m.get('item')}_{m.get('seller')}_{m.get('price')}"
-                current_msg_ids.add(msg_id)
-
-            # Rimuovi dalle UI le notifiche che sono presenti localmente ma non più nel backend
-            to_remove_local = [mid for mid in list(self.notified_items) if mid not in current_msg_ids]
-            for mid in to_remove_local:
-                self._remove_widget_by_msg_id(mid)
-                # Non aggiungerlo a suppressed: sparisce permanentemente finché backend non lo riporta di nuovo
-
-            # Aggiungi le nuove notifiche (ignorando quelle soppresse o già viste)
-            for m in matches:
-                msg_id = f"{m.get('item')}_{m.get('seller')}_{m.get('price')}"
-                if msg_id in self.notified_items or msg_id in self.suppressed_items:
-                    continue
+            return run_watch_batch(client, 'stop', entries)
+        def _on_success(results):
+            for item_url, ok, message in results:
+                if ok:
+                    print(f"Ricerca fermata per: {item_url}")
+                    if message != "OK":
+                        print("Offer Removal Error:", message)
+                else:
+                    print(f"Search Stop Error for {item_url}: {message}")
+                    self._restore_item(item_url, removed[item_url], item_url in was_watched)
+            if on_done is not None:
+                on_done(results, time.perf_counter() - start)
+        def _on_error(e):
+            print("Stop search request error:", e)
+            for item_url in item_urls:
+                self._restore_item(item_url, removed[item_url], item_url in was_watched)
+            if on_done is not None:
+                on_done([(item_url, False, str(e)) for item_url in item_urls], time.perf_counter() - start)
+        self.executor.submit(('POST', '/stop_watch', tuple(item_urls)), _task, _on_success, _on_error)
+
+    def _restore_item(self, item_url, offers, watched):
+        """Annulla la rimozione ottimistica di un item il cui stop è fallito"""
+        if watched:
+            self.watched_items.add(item_url)
+        restored = []
+        for offer in offers:
+            self.matches.unsuppress(offer.key)
+            if offer.key not in self.matches:
+                self.matches.add(offer.key, offer)
+                restored.append(offer)
+        self._queue_rows(restored)
 
-                # nuovo: aggiungi e crea widget
-                self.notified_items.add(msg_id)
-                offer_widget = OfferWidget(m, self)  # Passa l'istanza dell'overlay
-                self.vbox.addWidget(offer_widget)
+    def _flush_match_state(self):
+        store = self.match_store
+        def _on_error(e):
+            print("Match state save error:", e)
+        if time.monotonic() - self.last_compact >= MATCH_STATE_COMPACT_INTERVAL:
+            # la memoria resta piatta: le chiavi scadute escono anche dall'indice
+            self.matches.expire()
+            def _on_compacted(_):
+                self.last_compact = time.monotonic()
+            # chiave propria: non si aggancia a un flush in corso (compact fa anche il flush);
+            # finché non riesce viene ritentata al giro successivo
+            self.executor.submit(('DB', 'match_state', 'compact'), store.compact, _on_compacted, _on_error)
+            return
+        # se la scrittura precedente è ancora in corso, le modifiche restano in coda per la prossima
+        self.executor.submit(('DB', 'match_state'), store.flush, None, _on_error)
+
+    def _save_price_history(self):
+        def _on_error(e):
+            print("Price history save error:", e)
+        for source in ('market', 'matches'):
+            self.executor.submit(('SAVE', 'price_history', source), get_price_history(source).save, None, _on_error)
+        self.offer_view.viewport().update()
+        if self.manual_tab is not None:
+            for group in self.manual_tab.groups.values():
+                group.offer_view.viewport().update()
 
-                # Registra il widget per l'item
-                item_url = m.get('item')
-                if item_url not in self.offers_by_item:
-                    self.offers_by_item[item_url] = []
-                self.offers_by_item[item_url].append(offer_widget)
+    def _remove_matches(self, keys):
+        """Rimuove le righe delle chiavi indicate (se esistono) da UI e dal MatchIndex"""
+        keys = [key for key in keys if self.matches.discard(key) is not None]
+        self._drop_pending_rows(keys)
+        self.offer_model.remove_keys(keys)
+
+    def check_notifications(self, resync=False):
+        if resync:
+            self.match_sync.reset()
+        requested = time.perf_counter()
+        def _on_success(delta):
+            # None = 304; il delta è già calcolato nel worker contro il suo snapshot
+            activity = delta is not None and self._apply_match_delta(delta, since=requested)
+            self.scheduler.report('matches', ok=True, activity=activity)
         def _on_error(e):
             print("Overlay error:", e)
-        self._matches_worker.success.connect(_on_success)
-        self._matches_worker.error.connect(_on_error)
-        self._matches_worker.run(_task)
-            
+            self.scheduler.report('matches', ok=False)
+        # Se il poll precedente non è ancora tornato, questo tick lo attende
+        self.executor.submit(('GET', '/matches'), self.match_sync.fetch, _on_success, _on_error)
+
+    def _apply_match_delta(self, delta, since=None):
+        """
+        Applica un delta e restituisce True se sono comparsi nuovi match.
+        since: istante (perf_counter) della richiesta, per misurare il ritardo fino al render.
+        """
+        if delta.present is not None:
+            # Risincronizzazione: via tutto ciò che il backend non riporta più.
+            # Non aggiungerle a suppressed: spariscono finché il backend non le riporta di nuovo
+            self._remove_matches([k for k in self.matches.offers if k not in delta.present])
+        self._remove_matches(delta.removed)
+        fresh = []
+        resumed = []  # già notificati in precedenza (es. prima di un riavvio): righe sì, novità no
+        for m in delta.added:
+            key = m.key
+            if key in self.matches or self.matches.is_suppressed(key):
+                continue
+            # nuovo: registra subito, la riga arriva con il prossimo blocco
+            (resumed if self.matches.was_notified(key) else fresh).append(m)
+            self.matches.add(key, m)
+        # i nuovi vanno in testa, davanti a quelli ripresi
+        self._queue_rows(resumed, since)
+        self._queue_rows(fresh, since)
+        return bool(fresh)
+
+    def _on_stream_delta(self, delta):
+        start = time.perf_counter()
+        if self._apply_match_delta(delta, since=start):
+            self.scheduler.boost('matches')
+        METRICS.observe('slot', "stream delta", time.perf_counter() - start)
+
+    def _on_stream_connected(self, resumed):
+        # Con lo streaming attivo il polling periodico non serve più
+        self.scheduler.pause('matches')
+        if not resumed:
+            # Lo stream invia solo le novità: allinea prima lo stato completo
+            self.check_notifications(resync=True)
+
+    def _on_stream_disconnected(self):
+        # Finché lo stream è giù si torna al polling
+        self.scheduler.resume('matches')
+
+    def _queue_rows(self, offers, since=None):
+        """Accoda nuove righe: le più recenti prima delle già in attesa, a prezzo crescente"""
+        if not offers:
+            return
+        if self.pending_since is None:
+            self.pending_since = since or time.perf_counter()
+        offers.sort(key=offer_price_key, reverse=True)
+        for m in offers:
+            self.pending_rows[m.key] = m
+            self.pending_rows.move_to_end(m.key, last=False)
+        if not self.drain_timer.isActive():
+            self.drain_timer.start(0)
+        self._update_pending_label()
+
+    def _drain_pending_rows(self):
+        """Inserisce righe in attesa finché resta tempo nel budget di questo tick"""
+        start = time.perf_counter()
+        deadline = start + FRAME_BUDGET_MS / 1000
+        pending = self.pending_rows
+        self.offer_view.setUpdatesEnabled(False)
+        try:
+            # almeno un blocco per tick, anche se il budget è già finito
+            while pending:
+                chunk = [pending.popitem(last=False)[1] for _ in range(min(ROW_CHUNK, len(pending)))]
+                self.offer_model.extend(chunk)
+                if time.perf_counter() >= deadline:
+                    break
+        finally:
+            self.offer_view.setUpdatesEnabled(True)
+        now = time.perf_counter()
+        METRICS.observe('slot', "insert rows", now - start)
+        if pending:
+            # lascia girare l'event loop (paint, input) prima del prossimo blocco
+            self.drain_timer.start(0)
+        elif self.pending_since is not None:
+            # dalla richiesta (o dall'evento dello stream) all'ultima riga inserita
+            METRICS.observe('render', "poll to render", now - self.pending_since)
+            self.pending_since = None
+        self._update_pending_label()
+
+    def _drop_pending_rows(self, keys):
+        if self.pending_rows:
+            for key in keys:
+                self.pending_rows.pop(key, None)
+            if not self.pending_rows:
+                self.pending_since = None
+            self._update_pending_label()
+
+    def _update_pending_label(self):
+        n = len(self.pending_rows)
+        if n:
+            self.pending_label.setText(f"+{n} pending")
+        self.pending_label.setVisible(n > 0)
+
     def open_search_dialog(self):
         # Apre la dialog in base alla tab selezionata
+        if self.stats_tab is not None and self.tabs.currentWidget() is self.stats_tab:
+            return
         if self.tabs.currentIndex() == 0:  # Tab Sniper
-            dialog = SearchDialog(self)
+            dialog = self.get_search_dialog()
             if dialog.exec_() == QDialog.Accepted:
                 data = dialog.get_data()
                 if not data['item']:
                     return
-                headers = {'X-User-ID': self.user_id} if self.user_id else {}
-                self._start_worker = HttpWorker(self)
+                client = get_client()
                 def _task():
-                    resp = requests.post(
-                        f"{BACKEND_URL}/start_watch",
-                        data=data,
-                        headers=headers,
-                        timeout=5
-                    )
+                    resp = client.post("/start_watch", data=data)
                     return (resp.status_code, resp.text)
                 def _on_success(result):
                     status_code, text = result
@@ -1040,62 +3508,88 @@ class Overlay(QWidget):
                         print(f"Ricerca avviata per: {data['item']}")
                         # Calcola item_url dalla display name (stesso comportamento del backend)
                         item_url = to_item_url(data['item'])
+                        self.watched_items.add(item_url)
                         # Rimuovi dalle soppressioni tutti gli id relativi a questo item
-                        to_remove = [sid for sid in list(self.suppressed_items) if sid.startswith(f"{item_url}_")]
-                        for sid in to_remove:
-                            try:
-                                self.suppressed_items.remove(sid)
-                            except KeyError:
-                                pass
-                        # Forza un refresh immediato
-                        self.check_notifications()
+                        self.matches.unsuppress_item(item_url)
+                        # Forza un refresh completo immediato: le offerte tornate visibili
+                        # non compaiono nei delta perché il backend le ha già inviate
+                        self.check_notifications(resync=True)
+                        self.scheduler.boost('matches')
                     else:
                         print("Error starting Search:", text)
                 def _on_error(e):
                     print("Search Request Error:", e)
-                self._start_worker.success.connect(_on_success)
-                self._start_worker.error.connect(_on_error)
-                self._start_worker.run(_task)
+                key = ('POST', '/start_watch', to_item_url(data['item']))
+                self.executor.submit(key, _task, _on_success, _on_error)
         else:  # Tab Warframe Market
-            dialog = ManualSearchDialog(self)
+            dialog = self.get_manual_search_dialog()
             if dialog.exec_() == QDialog.Accepted:
                 data = dialog.get_data()
                 if not data['item']:
                     return
                 
                 # Avvia la ricerca manuale
-                self.manual_tab.search_offers(data['item'], data['rank_choice'], data['max_rank_override'])
+                self.ensure_manual_tab().search_offers(data['item'], data['rank_choice'], data['max_rank_override'])
                 
+    def open_watchlist(self):
+        if self.watchlist_dialog is None:
+            self.watchlist.load()
+            self.watchlist_dialog = WatchlistDialog(self.watchlist, self)
+            self.watchlist_dialog.startRequested.connect(lambda entries: self.run_watchlist('start', entries))
+            self.watchlist_dialog.stopRequested.connect(lambda entries: self.run_watchlist('stop', entries))
+        self.watchlist_dialog.show()
+        self.watchlist_dialog.raise_()
+        self.watchlist_dialog.activateWindow()
+
+    def run_watchlist(self, action, entries):
+        """Avvia/ferma tutte le voci in un'unica operazione e riporta l'esito per item"""
+        def _report(results, elapsed):
+            if self.watchlist_dialog is not None:
+                self.watchlist_dialog.show_results(action, results, elapsed)
+        if action == 'stop':
+            self.stop_items([to_item_url(e['item']) for e in entries], on_done=_report)
+            return
+        client = get_client()
+        start = time.perf_counter()
+        def _task():
+            return run_watch_batch(client, action, entries)
+        def _on_success(results):
+            elapsed = time.perf_counter() - start
+            started = False
+            for item_url, ok, message in results:
+                if not ok:
+                    print(f"Watchlist {action} error for {item_url}: {message}")
+                else:
+                    self.watched_items.add(item_url)
+                    self.matches.unsuppress_item(item_url)
+                    started = True
+            if started:
+                # come per start_watch: le offerte tornate visibili servono subito
+                self.check_notifications(resync=True)
+                self.scheduler.boost('matches')
+            _report(results, elapsed)
+        def _on_error(e):
+            print("Watchlist request error:", e)
+            if self.watchlist_dialog is not None:
+                self.watchlist_dialog.show_error(str(e))
+        self.executor.submit(('POST', 'watchlist', action), _task, _on_success, _on_error)
+
     def remove_item_widgets(self, item_url):
-        """Rimuovi tutti i widget per un item specifico e sopprimi temporaneamente i loro msg_id"""
-        if item_url in self.offers_by_item:
-            for widget in list(self.offers_by_item[item_url]):
-                try:
-                    msg_id = f"{widget.offer.get('item')}_{widget.offer.get('seller')}_{widget.offer.get('price')}"
-                except Exception:
-                    msg_id = None
-
-                if msg_id:
-                    # Sopprimi temporaneamente finché l'utente non riavvia la ricerca per questo item
-                    self.suppressed_items.add(msg_id)
-                    # Rimuovi anche dall'insieme di notifiche viste (se presente)
-                    if msg_id in self.notified_items:
-                        self.notified_items.remove(msg_id)
-
-                # rimozione widget
-                try:
-                    widget.setParent(None)
-                    widget.deleteLater()
-                except Exception:
-                    pass
+        """Rimuovi tutte le righe per un item, sopprimi temporaneamente le loro chiavi e restituisci le offerte tolte"""
+        keys = self.matches.item_keys(item_url)
+        offers = []
+        if keys:
+            for key in keys:
+                # Sopprimi temporaneamente finché l'utente non riavvia la ricerca per questo item
+                self.matches.suppress(key)
+                offers.append(self.matches.discard(key))
 
-            # cancella dalla mappa
-            try:
-                del self.offers_by_item[item_url]
-            except KeyError:
-                pass
+            # rimozione righe (e di quelle non ancora inserite)
+            self._drop_pending_rows(keys)
+            self.offer_model.remove_keys(keys)
 
             print(f"Rimossi tutti i widget per: {item_url}")
+        return offers
             
     def toggle_overlay(self):
         """Attiva/disattiva la visibilità dell'overlay"""
@@ -1114,33 +3608,114 @@ class Overlay(QWidget):
         """Nasconde l'overlay"""
         self.hide()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Dati freschi appena l'overlay torna visibile
+        self.scheduler.trigger('matches')
+        self.scheduler.refresh()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.scheduler.refresh()
+
+
+class IdentityResolver(QObject):
+    """Ricava l'user_id (IP locale) su un thread, senza bloccare l'avvio"""
+    resolved = pyqtSignal(str, float)  # user_id, ms impiegati
+
+    def start(self):
+        threading.Thread(target=self._run, name="wmsniper-identity", daemon=True).start()
+
+    def _run(self):
+        start = time.perf_counter()
+        user_id = get_local_ip()
+        if user_id == "127.0.0.1":
+            # Offline o rete non pronta: meglio l'ultimo IP noto del loopback
+            user_id = load_identity() or user_id
+        else:
+            save_identity(user_id)
+        self.resolved.emit(user_id, (time.perf_counter() - start) * 1000)
+
 
 class OverlaySystem:
     def __init__(self):
+        self.phases = []  # (fase, ms) per il resoconto dell'avvio
+        self._phase_start = _PROCESS_START
+        self._mark("imports")
         self.app = QApplication(sys.argv)
+        self.app.setStyleSheet(APP_STYLESHEET)
+        self.app.aboutToQuit.connect(get_client().close)
+        self._mark("qt")
         
-        # Usa automaticamente l'IP locale come user_id
-        local_ip = get_local_ip()
-        print(f"Using local IP as user ID: {local_ip}")
+        self.overlay = None
+        self.user_id = None
+        self.show_requested = False  # doppio click arrivato prima che l'overlay fosse pronto
         
-        # Crea l'overlay principale
-        self.overlay = Overlay(local_ip)
+        # Stato iniziale
+        self.system_visible = True
+        self.overlay_was_visible = False
         
-        # Crea l'icona di toggle
-        self.toggle_icon = ToggleIcon(self.overlay)
+        if LAZY_STARTUP:
+            # Icona subito; identità e overlay arrivano a event loop avviato
+            self.create_toggle_icon()
+            self._mark("icon")
+            self.identity = IdentityResolver()
+            self.identity.resolved.connect(self._on_identity_resolved)
+            self.identity.start()
+        else:
+            start = time.perf_counter()
+            local_ip = get_local_ip()
+            save_identity(local_ip)
+            self._on_identity_resolved(local_ip, (time.perf_counter() - start) * 1000)
+            self.create_toggle_icon()
+            self._mark("icon")
+            self.report_startup()
+
+    def _mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._phase_start) * 1000))
+        self._phase_start = now
+
+    def report_startup(self):
+        total = (time.perf_counter() - _PROCESS_START) * 1000
+        parts = ", ".join(f"{phase} {ms:.0f} ms" for phase, ms in self.phases)
+        print(f"Startup: {parts} (ready after {total:.0f} ms)")
+
+    def create_toggle_icon(self):
+        self.toggle_icon = ToggleIcon(self.toggle_overlay)
         
         # Posiziona l'icona in alto a destra
         screen_geom = self.app.primaryScreen().availableGeometry()
         self.toggle_icon.move(screen_geom.right() - 50, 20)
         self.toggle_icon.show()
-        
-        # Stato iniziale
-        self.system_visible = True
-        self.overlay_was_visible = False
 
+    def _on_identity_resolved(self, user_id, elapsed_ms):
+        # Usa automaticamente l'IP locale come user_id
+        print(f"Using local IP as user ID: {user_id}")
+        self.user_id = user_id
+        get_client().set_user_id(user_id)
+        self.phases.append(("identity", elapsed_ms))
+        self._phase_start = time.perf_counter()
+        
+        # Crea l'overlay principale (parte nascosto)
+        self.overlay = Overlay(user_id)
+        self._mark("overlay")
+        if LAZY_STARTUP:
+            self.report_startup()
+        if self.show_requested:
+            self.show_requested = False
+            self.overlay.show_overlay()
+
+    def toggle_overlay(self):
+        if self.overlay is None:
+            self.show_requested = not self.show_requested
+            return
+        self.overlay.toggle_overlay()
         
     def toggle_system(self):
         """Attiva/disattiva l'intero sistema (icona + overlay)"""
+        if self.overlay is None:
+            return
         if self.system_visible:
             # Salva lo stato corrente dell'overlay
             self.overlay_was_visible = self.overlay.isVisible()